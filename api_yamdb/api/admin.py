@@ -56,7 +56,7 @@ class ReviewAdmin(admin.ModelAdmin):
         'pub_date',
     )
     readonly_fields = ('author',)
-    search_fields = ('text',)
+    # Поиска по тексту нет: icontains не находит длинные тексты, хранимые сжатыми.
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
@@ -70,6 +70,6 @@ class CommentAdmin(admin.ModelAdmin):
         'review'
     )
     readonly_fields = ('author',)
-    search_fields = ('text',)
+    # Поиска по тексту нет: icontains не находит длинные тексты, хранимые сжатыми.
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
@@ -0,0 +1,120 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import cache
+from reviews.models import User
+
+ROLE_CLAIM = 'role'
+STAFF_CLAIM = 'is_staff'
+SUPERUSER_CLAIM = 'is_superuser'
+VERSION_CLAIM = 'auth_version'
+
+# sha256 токена -> проверенный токен; запись истекает вместе с токеном (exp).
+token_cache = cache.LRUCache('AUTH_TOKEN_CACHE_SIZE')
+
+
+def _version_key(user_id):
+    return f'auth:version:{user_id}'
+
+
+def get_auth_cache():
+    """Кэш версий прав; в памяти процесса или общий Redis/Memcached, не в базе."""
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def auth_version(user):
+    """Версия прав пользователя: меняется вместе с role, is_staff, is_superuser и is_active."""
+    state = f'{user.role}:{user.is_staff:d}:{user.is_superuser:d}:{user.is_active:d}'
+    return hashlib.sha256(state.encode()).hexdigest()[:16]
+
+
+def remember_version(user):
+    """Запоминает текущую версию прав пользователя и возвращает ее."""
+    version = auth_version(user)
+    get_auth_cache().set(_version_key(user.pk), version, timeout=settings.AUTH_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def forget_versions(user_ids):
+    """Токены этих пользователей снова проверяются по базе, пока версия не запомнится заново."""
+    get_auth_cache().delete_many([_version_key(user_id) for user_id in user_ids])
+
+
+class ClaimsAccessToken(AccessToken):
+    """Токен доступа с ролью, флагами is_staff/is_superuser и версией прав."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[STAFF_CLAIM] = user.is_staff
+        token[SUPERUSER_CLAIM] = user.is_superuser
+        token[VERSION_CLAIM] = remember_version(user)
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь из утверждений токена, без обращения к базе.
+
+    Хватает для проверки прав; полную модель возвращает full_user().
+    """
+    is_moderator = User.is_moderator
+    is_admin = User.is_admin
+
+    @cached_property
+    def role(self):
+        return self.token[ROLE_CLAIM]
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, которая не читает пользователя из базы на каждый запрос.
+
+    Если версия прав в токене совпадает с запомненной в кэше
+    AUTH_CACHE_ALIAS, пользователь строится из утверждений токена. Токены без
+    этих утверждений, токены, выданные до смены роли или флагов, и промах кэша
+    проверяются по базе, как в JWTAuthentication; после промаха кэша версия
+    запоминается снова.
+
+    Проверенные подпись и срок токена запоминаются в token_cache размером
+    AUTH_TOKEN_CACHE_SIZE, поэтому повторный запрос с тем же токеном его не декодирует.
+    """
+
+    def get_validated_token(self, raw_token):
+        digest = hashlib.sha256(raw_token).hexdigest()
+        validated_token = token_cache.get(digest)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            token_cache.set(digest, validated_token, expires_at=validated_token.get('exp'))
+        return validated_token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        version = validated_token.get(VERSION_CLAIM)
+        remembered = None
+        if user_id is not None and version is not None:
+            remembered = get_auth_cache().get(_version_key(user_id))
+            if remembered == version:
+                return ClaimsUser(validated_token)
+        user = super().get_user(validated_token)
+        # Устаревший токен при запомненной версии ничего не меняет в кэше.
+        if version is not None and remembered is None:
+            remember_version(user)
+        return user
+
+
+def full_user(user):
+    """Модель пользователя для представлений, которым мало утверждений токена."""
+    if isinstance(user, User):
+        return user
+    try:
+        return User.objects.get(pk=user.pk)
+    except User.DoesNotExist:
+        raise AuthenticationFailed('Пользователь не найден.', code='user_not_found')
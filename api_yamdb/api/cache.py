@@ -0,0 +1,236 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.http import urlencode
+
+TITLES = 'titles'
+CATALOG = 'catalog'
+USERS = 'users'
+
+
+def title_namespace(title_id):
+    return f'title:{title_id}'
+
+
+def reviews_namespace(title_id):
+    return f'reviews:{title_id}'
+
+
+def comments_namespace(review_id):
+    return f'comments:{review_id}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def is_process_local(alias=None):
+    """Кэш в памяти процесса: другие процессы (воркеры, manage.py) его не видят."""
+    return isinstance(caches[alias or settings.API_CACHE_ALIAS], LocMemCache)
+
+
+def _version_key(namespace):
+    return f'api:version:{namespace}'
+
+
+def get_version(namespace):
+    """Возвращает текущую версию пространства ключей.
+
+    Версия — время последнего изменения в наносекундах. Версии хранятся без
+    срока, поэтому ETag и Last-Modified неизменного ресурса не меняются. Если
+    версия вытеснена из кэша, то создается заново из текущего времени и не
+    совпадает ни с одной из выданных ранее. Изменения, о которых процесс не
+    узнал (другой процесс с кэшем в памяти), ограничивает только срок
+    кэшированных ответов API_CACHE_TIMEOUT.
+    """
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(namespaces):
+    """Возвращает версии нескольких пространств одним обращением к кэшу."""
+    cache = get_cache()
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(keys)
+    return {
+        namespace: found[key] if key in found else get_version(namespace)
+        for key, namespace in keys.items()
+    }
+
+
+def bump_version(namespace):
+    """Сдвигает версию, делая недействительными все ключи пространства."""
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = max(time.time_ns(), (cache.get(key) or 0) + 1)
+    cache.set(key, version, timeout=None)
+
+
+def bump_on_commit(*namespaces):
+    """Сдвигает версии пространств после фиксации текущей транзакции.
+
+    Иначе параллельный GET мог бы увидеть новую версию раньше новых строк
+    и сохранить под ней старый ответ. Вне транзакции версии сдвигаются сразу.
+    """
+    def bump():
+        for namespace in namespaces:
+            bump_version(namespace)
+    transaction.on_commit(bump)
+
+
+def changed_at(version):
+    """Время последнего изменения пространства в секундах."""
+    return version / 10 ** 9
+
+
+def _stats_key(namespace, counter):
+    return f'api:stats:{namespace}:{counter}'
+
+
+def _count(namespace, counter):
+    cache = get_cache()
+    key = _stats_key(namespace, counter)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_stats(namespace):
+    """Возвращает счетчики попаданий и промахов кэша.
+
+    С кэшем в памяти процесса счетчики видны только в этом процессе.
+    """
+    cache = get_cache()
+    return {
+        counter: cache.get(_stats_key(namespace, counter), 0)
+        for counter in ('hits', 'misses')
+    }
+
+
+def normalize_query(query_params, names):
+    """Собирает из параметров запроса строку, не зависящую от их порядка."""
+    items = sorted(
+        (name, value)
+        for name in names
+        for value in query_params.getlist(name)
+        if value != ''
+    )
+    return urlencode(items)
+
+
+def digest(parts):
+    return hashlib.md5('\n'.join(parts).encode()).hexdigest()
+
+
+def response_key(namespace, request, query):
+    # В ответе есть абсолютные ссылки next/previous, поэтому хост входит в ключ.
+    return f'api:response:{namespace}:{get_version(namespace)}:{digest([request.get_host(), query])}'
+
+
+def get_response_data(key, namespace):
+    data = get_cache().get(key)
+    _count(namespace, 'misses' if data is None else 'hits')
+    return data
+
+
+def set_response_data(key, data):
+    get_cache().set(key, data, settings.API_CACHE_TIMEOUT)
+
+
+class LRUCache:
+    """Потокобезопасный кэш в памяти процесса с вытеснением давно неиспользуемых ключей.
+
+    Ключу можно задать expires_at (время по time.time()): после него get()
+    считает ключ отсутствующим и удаляет его. maxsize — число или имя
+    настройки, которая читается при каждой записи; 0 выключает кэш.
+    """
+
+    def __init__(self, maxsize):
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self):
+        if isinstance(self._maxsize, str):
+            return getattr(settings, self._maxsize)
+        return self._maxsize
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            value, expires_at = self._data[key]
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value, expires_at=None):
+        maxsize = self.maxsize
+        if maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Счетчики попаданий и промахов и текущий размер."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
+
+    def __len__(self):
+        return len(self._data)
+
+
+# id -> username; сбрасывается сигналами при изменении пользователя.
+username_cache = LRUCache('USERNAME_CACHE_SIZE')
+
+
+def get_usernames(user_ids):
+    """Имена пользователей по id одним запросом, только колонки id и username."""
+    found = {}
+    missing = set()
+    for user_id in user_ids:
+        username = username_cache.get(user_id)
+        if username is None:
+            missing.add(user_id)
+        else:
+            found[user_id] = username
+    if missing:
+        rows = get_user_model().objects.filter(pk__in=missing).values_list('pk', 'username')
+        for user_id, username in rows:
+            found[user_id] = username
+            username_cache.set(user_id, username)
+    return found
@@ -0,0 +1,55 @@
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
+
+from reviews.compression import inflate
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+# Колонки выгрузки и имена полей в ней.
+REVIEW_EXPORT_FIELDS = {
+    'id': 'id',
+    'author__username': 'author',
+    'text': 'text',
+    'score': 'score',
+    'pub_date': 'pub_date',
+    'comments_count': 'comments_count',
+}
+
+_datetime_field = DateTimeField()
+
+
+def parse_since(value):
+    """Момент из ?since=; наивное время считается временем текущей зоны."""
+    if value is None:
+        return None
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({'since': 'Укажите дату и время в формате ISO 8601.'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_rows(queryset, since=None, chunk_size=2000):
+    """Строки выгрузки по возрастанию pub_date, без загрузки всей таблицы в память."""
+    if since is not None:
+        queryset = queryset.filter(pub_date__gt=since)
+    rows = queryset.order_by('pub_date', 'id').values_list(*REVIEW_EXPORT_FIELDS)
+    for values in rows.iterator(chunk_size=chunk_size):
+        row = dict(zip(REVIEW_EXPORT_FIELDS.values(), values))
+        row['text'] = inflate(row['text'])
+        yield row
+
+
+def ndjson_lines(rows):
+    """По одной JSON-строке на запись; даты — в том же формате, что и в API."""
+    for row in rows:
+        row['pub_date'] = _datetime_field.to_representation(row['pub_date'])
+        yield json.dumps(row, ensure_ascii=False) + '\n'
@@ -1,14 +1,48 @@
 import django_filters
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import filters
 
 from reviews.models import Title
+from reviews.normalization import normalize
+
+
+class NormalizedSearchFilter(filters.SearchFilter):
+    """SearchFilter по нормализованным теневым полям.
+
+    Поисковые слова приводятся к тому же виду, что и поля, поэтому регистр
+    кириллицы не мешает. Префикс '^' ищет по началу строки диапазоном по
+    индексу, '=' — точное совпадение, без префикса — подстрока.
+    """
+    lookup_prefixes = {
+        '^': 'prefix',
+        '=': 'exact',
+    }
+
+    def get_search_terms(self, request):
+        return [normalize(term) for term in super().get_search_terms(request)]
+
+    def construct_search(self, field_name):
+        lookup = self.lookup_prefixes.get(field_name[0])
+        if lookup:
+            field_name = field_name[1:]
+        else:
+            lookup = 'contains'
+        return LOOKUP_SEP.join([field_name, lookup])
 
 
 class TitleFilter(django_filters.FilterSet):
     category = django_filters.CharFilter(field_name='category__slug', )
     genre = django_filters.CharFilter(field_name='genre__slug', )
-    name = django_filters.CharFilter(field_name='name', lookup_expr='icontains')
+    name = django_filters.CharFilter(method='filter_name')
     year = django_filters.NumberFilter(field_name='year', )
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ['category', 'genre', 'name', 'year']
+        fields = ['category', 'genre', 'name', 'year', 'search']
+
+    def filter_name(self, queryset, name, value):
+        return queryset.name_contains(value)
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import cache
+
+
+class Command(BaseCommand):
+    help = 'Показывает счетчики попаданий и промахов кэша ответов API.'
+
+    def handle(self, *args, **options):
+        if cache.is_process_local():
+            self.stderr.write(self.style.WARNING(
+                'Кэш API хранится в памяти процесса: команда видит только свой пустой кэш. '
+                'Счетчики сервера отдает GET /api/v1/cache/stats/, либо настройте общий '
+                'бэкенд кэша (API_CACHE_ALIAS).'
+            ))
+        stats = cache.get_stats(cache.TITLES)
+        self.stdout.write(
+            f'{cache.TITLES}: hits={stats["hits"]} misses={stats["misses"]} '
+            f'version={cache.get_version(cache.TITLES)}'
+        )
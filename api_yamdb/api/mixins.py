@@ -0,0 +1,135 @@
+import math
+import time
+
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import permissions
+from rest_framework.response import Response
+
+from api import cache
+
+
+class ConditionalGetMixin:
+    """Добавляет ETag и Last-Modified к list и retrieve, отвечает 304 без сериализации.
+
+    ETag строится из версий пространств кэша (get_etag_namespaces), строки
+    запроса и формата ответа, а не из тела ответа. Last-Modified — время
+    последнего изменения этих пространств, а для отдельного объекта еще и
+    его last_modified_field. If-None-Match проверяется раньше, чем объект
+    загружается из базы.
+
+    Last-Modified округляется вверх до секунды и не отдается, пока эта
+    секунда не прошла: иначе изменение в ту же секунду получило бы то же
+    значение, и If-Modified-Since вернул бы устаревший 304.
+    """
+    last_modified_field = None
+
+    def get_etag_namespaces(self):
+        raise NotImplementedError('`get_etag_namespaces()` must be implemented.')
+
+    def get_versions(self):
+        if not hasattr(self, '_versions'):
+            self._versions = cache.get_versions(self.get_etag_namespaces())
+        return self._versions
+
+    def get_etag(self, request):
+        versions = self.get_versions()
+        parts = [
+            *(f'{namespace}={versions[namespace]}' for namespace in sorted(versions)),
+            request.get_full_path(),
+            request.accepted_renderer.format,
+        ]
+        return f'"{cache.digest(parts)}"'
+
+    def get_last_modified(self, instance=None):
+        timestamp = cache.changed_at(max(self.get_versions().values()))
+        if instance is not None and self.last_modified_field:
+            timestamp = max(timestamp, getattr(instance, self.last_modified_field).timestamp())
+        return math.ceil(timestamp)
+
+    def conditional_response(self, request, etag, last_modified=None):
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None and response.status_code == 304:
+            response['ETag'] = etag
+        return response
+
+    def set_validators(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified <= time.time():
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        last_modified = self.get_last_modified()
+        response = self.conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = super().list(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            response = self.conditional_response(request, etag)
+            if response is not None:
+                return response
+        instance = self.get_object()
+        last_modified = self.get_last_modified(instance)
+        response = self.conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return self.set_validators(Response(serializer.data), etag, last_modified)
+
+
+class RestoreArchivedMixin:
+    """Изменяет и удаляет архивные объекты, возвращая их в оперативную таблицу.
+
+    Если объекта из адреса нет в get_queryset(), он ищется в
+    get_archived_queryset(); после проверки прав restore_archived(pk)
+    переносит его обратно, и запрос продолжается как для обычного объекта.
+    """
+
+    def get_archived_queryset(self):
+        raise NotImplementedError('`get_archived_queryset()` must be implemented.')
+
+    def restore_archived(self, pk):
+        raise NotImplementedError('`restore_archived()` must be implemented.')
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.request.method in permissions.SAFE_METHODS:
+                raise
+        archived = get_object_or_404(self.get_archived_queryset(), pk=self.kwargs[self.lookup_url_kwarg or 'pk'])
+        self.check_object_permissions(self.request, archived)
+        self.restore_archived(archived.pk)
+        return super().get_object()
+
+
+class CachedListMixin:
+    """Кэширует данные ответа list до следующего изменения cache_namespace.
+
+    Ключ строится из параметров get_cache_query_names(), приведенных к
+    порядку, не зависящему от запроса.
+    """
+    cache_namespace = None
+
+    def get_cache_query_names(self):
+        raise NotImplementedError('`get_cache_query_names()` must be implemented.')
+
+    def list(self, request, *args, **kwargs):
+        query = cache.normalize_query(request.query_params, self.get_cache_query_names())
+        key = cache.response_key(self.cache_namespace, request, query)
+        data = cache.get_response_data(key, self.cache_namespace)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set_response_data(key, response.data)
+        return response
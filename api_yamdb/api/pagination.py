@@ -0,0 +1,71 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CursorOrPageNumberPagination(PageNumberPagination):
+    """Постраничная пагинация с курсорным режимом по запросу.
+
+    По умолчанию работает как PageNumberPagination. С параметром
+    ?pagination=cursor (и по ссылкам next/previous, содержащим ?cursor=)
+    переключается на курсорную пагинацию по ordering: без COUNT(*) и OFFSET,
+    поэтому дальние страницы стоят столько же, сколько первая, если значения
+    первого поля ordering уникальны. Среди одинаковых значений курсор
+    запоминает смещение, и такие страницы снова читаются через OFFSET.
+
+    Параметры из cursor_conflicting_params задают свой порядок, который курсор
+    заменил бы на ordering, поэтому вместе с курсорным режимом они запрещены.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    ordering = None
+    cursor_conflicting_params = ()
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        return (request.query_params.get(self.mode_query_param) == self.cursor_mode
+                or CursorPagination.cursor_query_param in request.query_params)
+
+    def get_query_param_names(self):
+        """Параметры запроса, от которых зависит страница."""
+        return self.page_query_param, self.mode_query_param, CursorPagination.cursor_query_param
+
+    def get_cursor_paginator(self):
+        paginator = CursorPagination()
+        paginator.ordering = self.ordering
+        paginator.page_size = self.page_size
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            conflicting = [name for name in self.cursor_conflicting_params if name in request.query_params]
+            if conflicting:
+                raise ValidationError({
+                    name: [f'Нельзя использовать вместе с {self.mode_query_param}={self.cursor_mode}.']
+                    for name in conflicting
+                })
+            self.cursor_paginator = self.get_cursor_paginator()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+
+class TitlePagination(CursorOrPageNumberPagination):
+    """Пагинация произведений, курсор по названию; поиск упорядочен по релевантности."""
+    ordering = 'name'
+    cursor_conflicting_params = ('search',)
+
+
+class PublicationDatePagination(CursorOrPageNumberPagination):
+    """Пагинация отзывов и комментариев, курсор по дате публикации."""
+    ordering = '-pub_date'
@@ -0,0 +1,6 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """Схема OpenAPI для StatelessJWTAuthentication: тот же Bearer JWT."""
+    target_class = 'api.authentication.StatelessJWTAuthentication'
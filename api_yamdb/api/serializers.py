@@ -1,10 +1,49 @@
 from django.contrib.auth import get_user_model
+from django.db import models
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from reviews.models import Category, Genre, Title, Review, Comment
+from api.cache import get_usernames
+from reviews.models import SCORE_FIELDS, Category, Genre, Title, Review, Comment
 
 User = get_user_model()
 
+AUTHOR_USERNAMES = 'author_usernames'
+EMBEDDED_COMMENTS = 'embedded_comments'
+
+# Служебные поля произведения: теневое поле поиска и денормализованные счетчики.
+TITLE_HIDDEN_FIELDS = ('name_normalized', 'rating_sum', 'rating_count', *SCORE_FIELDS)
+
+
+@extend_schema_field(serializers.CharField())
+class AuthorField(serializers.Field):
+    """Имя автора по author_id без загрузки всего пользователя."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        if type(instance).author.is_cached(instance):
+            return instance.author.username
+        usernames = self.context.get(AUTHOR_USERNAMES, {})
+        if instance.author_id not in usernames:
+            usernames = get_usernames([instance.author_id])
+        return usernames.get(instance.author_id)
+
+
+class AuthorListSerializer(serializers.ListSerializer):
+    """Загружает имена авторов всей страницы одним запросом до сериализации."""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        usernames = self.context.setdefault(AUTHOR_USERNAMES, {})
+        missing = {item.author_id for item in items} - usernames.keys()
+        if missing:
+            usernames.update(get_usernames(missing))
+        return super().to_representation(items)
+
 
 class SignupSerializer(serializers.Serializer):
     """Создает пользователя."""
@@ -55,7 +94,7 @@ class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
-        exclude = ('id',)
+        exclude = ('id', 'name_normalized')
         unique_together = ('slug',)
 
 
@@ -64,7 +103,7 @@ class GenreSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Genre
-        exclude = ('id',)
+        exclude = ('id', 'name_normalized')
         unique_together = ('slug',)
 
 
@@ -82,37 +121,72 @@ class TitleCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = TITLE_HIDDEN_FIELDS
 
 
 class TitleSerializer(serializers.ModelSerializer):
     """Возвращает список всех произведений, обновляет и удаляет произведения."""
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
-    rating = serializers.IntegerField()
+    rating = serializers.IntegerField(read_only=True)
+    # Каждый отзыв — ровно одна оценка, поэтому отдельный счетчик не нужен.
+    reviews_count = serializers.IntegerField(source='rating_count', read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = TITLE_HIDDEN_FIELDS
+
+
+class TitleHistogramSerializer(TitleSerializer):
+    """Произведение вместе с распределением оценок {оценка: количество}."""
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
 
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Возвращает список всех отзывов, создает, обновляет и удаляет отзывы к произведениям."""
-    author = serializers.StringRelatedField(
-        read_only=True, default=serializers.CurrentUserDefault())
+    author = AuthorField()
 
     class Meta:
         model = Review
         fields = '__all__'
         read_only_fields = ('pub_date', 'title')
+        list_serializer_class = AuthorListSerializer
 
 
 class CommentSerializer(serializers.ModelSerializer):
     """Возвращает список всех комментариев, создает, обновляет и удаляет комментарии к отзывам."""
-    author = serializers.StringRelatedField(
-        read_only=True, default=serializers.CurrentUserDefault())
+    author = AuthorField()
 
     class Meta:
         model = Comment
         fields = '__all__'
         read_only_fields = ('pub_date', 'review')
+        list_serializer_class = AuthorListSerializer
+
+
+class ReviewBulkSerializer(ReviewSerializer):
+    """Элемент массового создания отзывов: произведение указывается в самом элементе."""
+    title = serializers.IntegerField(source='title_id', min_value=1)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ('title', 'author', 'text', 'score')
+        read_only_fields = ()
+
+
+class CommentBulkSerializer(CommentSerializer):
+    """Элемент массового создания комментариев: отзыв указывается в самом элементе."""
+    review = serializers.IntegerField(source='review_id', min_value=1)
+
+    class Meta(CommentSerializer.Meta):
+        fields = ('review', 'author', 'text')
+        read_only_fields = ()
+
+
+class ReviewWithCommentsSerializer(ReviewSerializer):
+    """Отзыв с последними комментариями, загруженными заранее в context['embedded_comments']."""
+    comments = serializers.SerializerMethodField()
+
+    @extend_schema_field(CommentSerializer(many=True))
+    def get_comments(self, review):
+        comments = self.context.get(EMBEDDED_COMMENTS, {}).get(review.pk, [])
+        return CommentSerializer(comments, many=True, context=self.context).data
@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api import cache
+from api.authentication import forget_versions, remember_version
+from reviews.models import ArchivedComment, ArchivedReview, Category, Comment, Genre, Review, Title, users_updated
+from reviews.signals import bulk_changed
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=ArchivedReview)
+@receiver(m2m_changed, sender=Title.genre.through)
+def titles_changed(sender, **kwargs):
+    """Делает недействительным кэш списка произведений."""
+    cache.bump_on_commit(cache.TITLES)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    cache.bump_on_commit(cache.title_namespace(instance.pk))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        cache.bump_on_commit(cache.title_namespace(instance.pk))
+    elif pk_set:
+        cache.bump_on_commit(*(cache.title_namespace(title_id) for title_id in pk_set))
+    else:
+        cache.bump_on_commit(cache.CATALOG)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def catalog_changed(sender, **kwargs):
+    """Категории и жанры вложены в каждое произведение."""
+    cache.bump_on_commit(cache.CATALOG)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=ArchivedReview)
+def review_changed(sender, instance, **kwargs):
+    # От отзывов зависит рейтинг произведения.
+    cache.bump_on_commit(cache.title_namespace(instance.title_id), cache.reviews_namespace(instance.title_id))
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    """Список отзывов удаленного произведения должен отвечать 404, а не 304."""
+    cache.bump_on_commit(cache.reviews_namespace(instance.pk))
+
+
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=ArchivedReview)
+def review_deleted(sender, instance, **kwargs):
+    """Список комментариев удаленного отзыва должен отвечать 404, а не 304."""
+    cache.bump_on_commit(cache.comments_namespace(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    cache.bump_on_commit(cache.comments_namespace(instance.review_id))
+    # Последние комментарии встраиваются в список отзывов (?embed=comments).
+    if Comment.review.is_cached(instance):
+        title_id = instance.review.title_id
+    else:
+        title_id = Review.objects.filter(pk=instance.review_id).values_list('title_id', flat=True).first()
+    if title_id is not None:
+        cache.bump_on_commit(cache.reviews_namespace(title_id))
+
+
+@receiver(post_delete, sender=ArchivedComment)
+def archived_comment_deleted(sender, instance, **kwargs):
+    cache.bump_on_commit(cache.comments_namespace(instance.review_id))
+    for model in (Review, ArchivedReview):
+        title_id = model.objects.filter(pk=instance.review_id).values_list('title_id', flat=True).first()
+        if title_id is not None:
+            cache.bump_on_commit(cache.reviews_namespace(title_id))
+            break
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    """Имена авторов выводятся в отзывах и комментариях: важна только смена имени.
+
+    Новый пользователь еще ничего не написал, а вход или правка профиля
+    не должны менять ETag всех отзывов и комментариев.
+    """
+    if created or getattr(instance, '_saved_username', None) == instance.username:
+        return
+    user_removed(sender, instance)
+
+
+@receiver(post_delete, sender=User)
+def user_removed(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: cache.username_cache.pop(pk))
+    cache.bump_on_commit(cache.USERS)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    """Токены, выданные до смены роли или флагов, снова проверяются по базе."""
+    remember_version(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_versions([instance.pk])
+
+
+@receiver(users_updated)
+def users_bulk_updated(sender, pks, **kwargs):
+    """update() и bulk_update() не вызывают post_save: версии прав забываются здесь."""
+    forget_versions(pks)
+
+
+@receiver(bulk_changed)
+def data_bulk_changed(sender, **kwargs):
+    """Версии произведений, отзывов и комментариев зависят от этих пространств."""
+    cache.bump_on_commit(cache.TITLES, cache.CATALOG, cache.USERS)
+    if cache.is_process_local():
+        return (
+            'Кэш API хранится в памяти процесса: запущенный сервер не узнает об изменениях '
+            f'и будет отдавать старые списки до {settings.API_CACHE_TIMEOUT} с., а 304 — до перезапуска. '
+            'Для сброса кэша сервера нужен общий бэкенд кэша (API_CACHE_ALIAS).'
+        )
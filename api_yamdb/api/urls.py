@@ -25,5 +25,8 @@ auth_patterns = [
 urlpatterns = [
     path('auth/', include(auth_patterns), name='auth'),
     path('users/me/', views.MeAPIView.as_view(), name='current_user'),
+    path('cache/stats/', views.CacheStatsAPIView.as_view(), name='cache_stats'),
+    path('reviews/bulk/', views.ReviewBulkCreateAPIView.as_view(), name='reviews_bulk'),
+    path('comments/bulk/', views.CommentBulkCreateAPIView.as_view(), name='comments_bulk'),
     path('', include(router.urls), name='api-root'),
 ]
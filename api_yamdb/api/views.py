@@ -1,59 +1,88 @@
+from collections import Counter, defaultdict
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters
 from rest_framework import mixins
 from rest_framework import permissions
 from rest_framework import status
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import AccessToken
 
+from api import cache
+from api.authentication import ClaimsAccessToken, full_user, token_cache
 from api import serializers
-from api.filters import TitleFilter
+from api.export import NDJSON_CONTENT_TYPE, export_rows, ndjson_lines, parse_since
+from api.filters import NormalizedSearchFilter, TitleFilter
+from api.mixins import CachedListMixin, ConditionalGetMixin, RestoreArchivedMixin
+from api.pagination import PublicationDatePagination, TitlePagination
 from api.permissions import IsAdmin, IsAdminOrReadOnly, IsAuthorOrStaffOrReadOnly
 from api_yamdb import settings
-from reviews.models import Category, Genre, Title, Review
+from reviews import aggregates, outbox
+from reviews.archive import read_through_comments, read_through_reviews, restore_comment, restore_review
+from reviews.models import ArchivedComment, ArchivedReview, Category, Comment, Genre, Title, Review
 
 User = get_user_model()
 
+DUPLICATE_REVIEW_MESSAGE = 'Нельзя отставлять больше одного отзыва к произведению'
+EMBED_COMMENTS_LIMIT = 3
+EMBED_COMMENTS_MAX_LIMIT = 20
+EXPORT_CHUNK_SIZE = 2000
+
+
+def comma_separated_param(request, name):
+    """Значения параметра вида ?name=a,b как множество."""
+    return set(filter(None, request.query_params.get(name, '').split(',')))
+
 
 class SignupAPIView(APIView):
     """Создает пользователя."""
 
     def __send_email(self, user):
+        """Ставит письмо с кодом в очередь не чаще раза за EMAIL_COALESCE_WINDOW секунд."""
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
-            f'Activation',
+        outbox.enqueue_coalesced(
+            f'confirmation:{user.pk}',
+            'Activation',
             f'{user.username}, Ваш код подтверждения {confirmation_code}',
             settings.EMAIL_HOST_USER,
             [user.email],
-            fail_silently=False,
         )
 
+    @staticmethod
+    def matching_users(username, email):
+        """Не больше двух пользователей с таким username или email — одним запросом."""
+        return list(User.objects.filter(Q(username=username) | Q(email=email))[:2])
+
     def post(self, request):
         serializer = serializers.SignupSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        serializer.is_valid()
         username = serializer.validated_data.get('username')
         user_email = serializer.validated_data.get('email')
-        if User.objects.filter(username=username, email=user_email).exists():
-            user = get_object_or_404(User, username=username)
-            self.__send_email(user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        elif User.objects.filter(Q(username=username) | Q(email=user_email)).exists():
-            return Response({"Данный username либо email уже используется"}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            new_user = User.objects.create(username=username, email=user_email)
-            self.__send_email(new_user)
+        users = self.matching_users(username, user_email)
+        if not users:
+            try:
+                with transaction.atomic():
+                    new_user = User.objects.create(username=username, email=user_email)
+                    self.__send_email(new_user)
+            except IntegrityError:
+                # Параллельный запрос успел создать пользователя с тем же username или email.
+                users = self.matching_users(username, user_email)
+            else:
+                return Response(serializer.data, status=status.HTTP_200_OK)
+        if len(users) == 1 and (users[0].username, users[0].email) == (username, user_email):
+            self.__send_email(users[0])
             return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response({"Данный username либо email уже используется"}, status=status.HTTP_400_BAD_REQUEST)
 
 
 class LoginAPIView(APIView):
@@ -66,7 +95,7 @@ class LoginAPIView(APIView):
         confirmation_code = serializer.data.get('confirmation_code')
         user = get_object_or_404(User, username=username)
         if default_token_generator.check_token(user, confirmation_code):
-            token = AccessToken.for_user(user)
+            token = ClaimsAccessToken.for_user(user)
             return Response({"token": str(token)}, status=status.HTTP_200_OK)
         return Response({"confirmation_code": 'Введен неверный код!'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -76,8 +105,8 @@ class UsersViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = serializers.UsersSerializer
     permission_classes = [IsAdmin]
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('username',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('username_normalized',)
     lookup_field = 'username'
 
 
@@ -86,12 +115,12 @@ class MeAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        serializer = serializers.MeSerializer(self.request.user)
+        serializer = serializers.MeSerializer(full_user(self.request.user))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def patch(self, request):
         serializer = serializers.MeSerializer(
-            self.request.user,
+            full_user(self.request.user),
             data=request.data,
             partial=True
         )
@@ -100,6 +129,20 @@ class MeAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class CacheStatsAPIView(APIView):
+    """Счетчики кэшей API в процессе, который обслуживает запрос."""
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        stats = cache.get_stats(cache.TITLES)
+        stats['version'] = cache.get_version(cache.TITLES)
+        return Response({
+            cache.TITLES: stats,
+            'tokens': token_cache.stats(),
+            'usernames': cache.username_cache.stats(),
+        }, status=status.HTTP_200_OK)
+
+
 class CategoryViewSet(mixins.ListModelMixin,
                       mixins.CreateModelMixin,
                       mixins.DestroyModelMixin,
@@ -108,8 +151,8 @@ class CategoryViewSet(mixins.ListModelMixin,
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('name',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('name_normalized',)
     lookup_field = 'slug'
 
 
@@ -121,60 +164,353 @@ class GenreViewSet(mixins.ListModelMixin,
     queryset = Genre.objects.all()
     serializer_class = serializers.GenreSerializer
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('name',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('name_normalized',)
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     """Возвращает список всех произведений, создает, обновляет и удаляет произведения."""
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).order_by('name')
+    queryset = Title.objects.select_related('category').prefetch_related('genre').order_by('name')
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
+    cache_namespace = cache.TITLES
+
+    def get_etag_namespaces(self):
+        if self.action == 'list':
+            return (cache.TITLES,)
+        return cache.CATALOG, cache.title_namespace(self.kwargs.get('pk'))
+
+    def get_cache_query_names(self):
+        return [*self.filterset_class.base_filters, *self.paginator.get_query_param_names()]
 
     def get_serializer_class(self):
         if self.action in ('create', 'partial_update'):
             return serializers.TitleCreateSerializer
+        if self.action == 'retrieve' and 'histogram' in comma_separated_param(self.request, 'include'):
+            return serializers.TitleHistogramSerializer
         return serializers.TitleSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    """Возвращает список всех отзывов, создает, обновляет и удаляет отзывы к произведениям."""
-    serializer_class = serializers.ReviewSerializer
+class ReviewViewSet(ConditionalGetMixin, RestoreArchivedMixin, viewsets.ModelViewSet):
+    """Возвращает список всех отзывов, создает, обновляет и удаляет отзывы к произведениям.
+
+    ?embed=comments&comments_limit=N добавляет к каждому отзыву списка N последних комментариев.
+    """
     permission_classes = [IsAuthorOrStaffOrReadOnly]
+    pagination_class = PublicationDatePagination
+    last_modified_field = 'pub_date'
+
+    def get_etag_namespaces(self):
+        return cache.USERS, cache.reviews_namespace(self.kwargs.get('title_id'))
+
+    @cached_property
+    def title(self):
+        """Произведение из адреса, загружается один раз за запрос."""
+        return get_object_or_404(Title, id=self.kwargs.get("title_id"))
 
     def get_queryset(self):
-        title_id = self.kwargs.get("title_id")
-        title = get_object_or_404(Title, id=title_id)
-        reviews = title.reviews.all()
-        return reviews
+        if self.request.method in permissions.SAFE_METHODS:
+            # Архивные отзывы видны наравне с оперативными; изменяемый
+            # архивный отзыв сначала возвращается в оперативную таблицу.
+            return read_through_reviews(title_id=self.title.pk)
+        return self.title.reviews.all()
+
+    def get_archived_queryset(self):
+        return ArchivedReview.objects.filter(title_id=self.title.pk)
+
+    def restore_archived(self, pk):
+        restore_review(pk)
+
+    @cached_property
+    def embeds_comments(self):
+        return self.action == 'list' and 'comments' in comma_separated_param(self.request, 'embed')
+
+    def get_serializer_class(self):
+        if self.embeds_comments:
+            return serializers.ReviewWithCommentsSerializer
+        return serializers.ReviewSerializer
+
+    def get_comments_limit(self):
+        value = self.request.query_params.get('comments_limit', EMBED_COMMENTS_LIMIT)
+        try:
+            limit = int(value)
+        except (TypeError, ValueError):
+            limit = 0
+        if not 1 <= limit <= EMBED_COMMENTS_MAX_LIMIT:
+            raise ValidationError({
+                'comments_limit': f'Укажите целое число от 1 до {EMBED_COMMENTS_MAX_LIMIT}.'
+            })
+        return limit
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.embeds_comments:
+            self.embed_comments(page)
+        return page
+
+    def embed_comments(self, reviews):
+        """Последние комментарии и имена всех авторов страницы: по одному запросу."""
+        self.embedded_comments = {review.pk: [] for review in reviews}
+        for comment in Comment.objects.latest_for_reviews(list(self.embedded_comments), self.get_comments_limit()):
+            self.embedded_comments[comment.review_id].append(comment)
+        author_ids = {review.author_id for review in reviews}
+        author_ids.update(
+            comment.author_id for comments in self.embedded_comments.values() for comment in comments
+        )
+        self.author_usernames = cache.get_usernames(author_ids)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if hasattr(self, 'embedded_comments'):
+            context[serializers.EMBEDDED_COMMENTS] = self.embedded_comments
+            context[serializers.AUTHOR_USERNAMES] = self.author_usernames
+        return context
+
+    def save_review(self, serializer):
+        """Сохраняет отзыв; повтор пары автор–произведение отклоняет уникальный индекс.
+
+        Архивные отзывы уникальным индексом не покрыты: они проверяются после
+        вставки в той же транзакции, и при совпадении вставка откатывается.
+        Так отзыв, перенесенный в архив между проверкой и вставкой, не
+        проходит незамеченным.
+        """
+        creating = serializer.instance is None
+        with transaction.atomic():
+            serializer.save(author_id=self.request.user.pk, title=self.title)
+            if creating and ArchivedReview.objects.filter(
+                    title=self.title, author_id=self.request.user.pk).exists():
+                raise ValidationError(DUPLICATE_REVIEW_MESSAGE)
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get("title_id")
-        title = get_object_or_404(Title, id=title_id)
-        user = self.request.user
-        if Review.objects.filter(author=user, title=title).exists():
-            raise ValidationError('Нельзя отставлять больше одного отзыва к произведению')
-        serializer.save(author=user, title=title)
+        try:
+            self.save_review(serializer)
+        except IntegrityError:
+            raise ValidationError(DUPLICATE_REVIEW_MESSAGE)
 
+    @action(detail=False, methods=['put'], url_path='mine')
+    def mine(self, request, title_id=None):
+        """Создает или заменяет отзыв текущего пользователя; повторный запрос безопасен."""
+        review = self.get_queryset().filter(author_id=request.user.pk).first()
+        if review is None:
+            archived = self.get_archived_queryset().filter(author_id=request.user.pk).first()
+            if archived is not None and restore_review(archived.pk):
+                review = self.get_queryset().get(pk=archived.pk)
+        serializer = self.get_serializer(review, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            self.save_review(serializer)
+        except IntegrityError:
+            # Параллельный запрос успел создать отзыв: повторяем как обновление.
+            review = self.get_queryset().get(author_id=request.user.pk)
+            serializer = self.get_serializer(review, data=request.data)
+            serializer.is_valid(raise_exception=True)
+            self.save_review(serializer)
+        response_status = status.HTTP_201_CREATED if review is None else status.HTTP_200_OK
+        return Response(serializer.data, status=response_status)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request, title_id=None):
+        """Все отзывы произведения потоком NDJSON; ?since= — только опубликованные позже."""
+        since = parse_since(request.query_params.get('since'))
+        rows = export_rows(self.get_queryset(), since=since, chunk_size=EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(ndjson_lines(rows), content_type=NDJSON_CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename="title-{self.title.pk}-reviews.ndjson"'
+        return response
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(ConditionalGetMixin, RestoreArchivedMixin, viewsets.ModelViewSet):
     """Возвращает список всех комментариев, создает, обновляет и удаляет комментарии к отзывам."""
     serializer_class = serializers.CommentSerializer
     permission_classes = [IsAuthorOrStaffOrReadOnly]
+    pagination_class = PublicationDatePagination
+    last_modified_field = 'pub_date'
+
+    def get_etag_namespaces(self):
+        return cache.USERS, cache.comments_namespace(self.kwargs.get('review_id'))
+
+    @cached_property
+    def review(self):
+        """Отзыв из адреса одним запросом; 404, если он не относится к произведению."""
+        lookups = {'pk': self.kwargs.get("review_id"), 'title_id': self.kwargs.get("title_id")}
+        if self.request.method in permissions.SAFE_METHODS:
+            return get_object_or_404(read_through_reviews(**lookups))
+        try:
+            return get_object_or_404(Review, **lookups)
+        except Http404:
+            # Комментарии к архивному отзыву пишутся после его возврата из архива.
+            archived = get_object_or_404(ArchivedReview, **lookups)
+            restore_review(archived.pk)
+            return get_object_or_404(Review, **lookups)
 
     def get_queryset(self):
-        title_id = self.kwargs.get("title_id")
-        title = get_object_or_404(Title, id=title_id)
-        review_id = self.kwargs.get("review_id")
-        review = title.reviews.get(pk=review_id)
-        comments = review.comments.all()
-        return comments
+        if self.request.method in permissions.SAFE_METHODS:
+            return read_through_comments(review_id=self.review.pk)
+        return self.review.comments.all()
+
+    def get_archived_queryset(self):
+        return ArchivedComment.objects.filter(review_id=self.review.pk)
+
+    def restore_archived(self, pk):
+        restore_comment(pk)
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get("title_id")
-        title = get_object_or_404(Title, id=title_id)
-        review_id = self.kwargs.get("review_id")
-        review = title.reviews.get(pk=review_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author_id=self.request.user.pk, review=self.review)
+
+
+class BulkCreateAPIView(APIView):
+    """Создает несколько объектов одним запросом: все или ни одного.
+
+    Принимает JSON-массив до BULK_CREATE_MAX_ITEMS элементов. Каждый элемент
+    проверяется serializer_class; при любой ошибке отвечает 400 со списком
+    ошибок по позициям (пустой словарь — элемент без ошибок) и ничего не
+    сохраняет. Объекты вставляются одним bulk_create, счетчики обновляются
+    в той же транзакции. Проверки check_created выполняются после вставки,
+    в той же транзакции; при ошибке вставка откатывается. В ответе — id
+    созданных объектов в порядке элементов запроса.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = None
+    model = None
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'view': self}
+
+    def check_items(self, items, errors):
+        """Проверки, которым нужна база, — сразу для всех элементов."""
+
+    def check_created(self, objects, errors):
+        """Проверки уже вставленных объектов, которые не покрывает уникальный индекс."""
+
+    def assign_ids(self, objects):
+        """Проставляет id объектам, если bulk_create их не вернул (SQLite в Django 3.2).
+
+        После вставки транзакция держит блокировку записи, а id растут
+        (AUTOINCREMENT), поэтому последние len(objects) id таблицы — наши,
+        в порядке вставки.
+        """
+        if objects[0].pk is not None:
+            return
+        ids = list(self.model.objects.order_by('-pk').values_list('pk', flat=True)[:len(objects)])
+        for obj, pk in zip(objects, reversed(ids)):
+            obj.pk = pk
+
+    def update_aggregates(self, objects):
+        pass
+
+    def invalidate_cache(self, objects):
+        pass
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list) or not 1 <= len(items) <= settings.BULK_CREATE_MAX_ITEMS:
+            raise ValidationError(f'Ожидается массив от 1 до {settings.BULK_CREATE_MAX_ITEMS} элементов.')
+        context = self.get_serializer_context()
+        validated, errors = {}, []
+        for index, item in enumerate(items):
+            serializer = self.serializer_class(data=item, context=context)
+            if serializer.is_valid():
+                validated[index] = serializer.validated_data
+                errors.append({})
+            else:
+                errors.append(serializer.errors)
+        self.check_items(validated, errors)
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        objects = [self.model(author_id=request.user.pk, **data) for data in validated.values()]
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(objects)
+                self.assign_ids(objects)
+                self.check_created(dict(zip(validated, objects)), errors)
+                if any(errors):
+                    raise ValidationError({'errors': errors})
+                self.update_aggregates(objects)
+        except IntegrityError:
+            raise ValidationError('Объекты изменились во время создания, повторите запрос.')
+        self.invalidate_cache(objects)
+        return Response(
+            {'created': len(objects), 'ids': [obj.pk for obj in objects]}, status=status.HTTP_201_CREATED
+        )
+
+
+class ReviewBulkCreateAPIView(BulkCreateAPIView):
+    """Создает отзывы текущего пользователя к нескольким произведениям."""
+    serializer_class = serializers.ReviewBulkSerializer
+    model = Review
+
+    def check_items(self, items, errors):
+        title_ids = {data['title_id'] for data in items.values()}
+        existing_titles = set(Title.objects.filter(pk__in=title_ids).values_list('pk', flat=True))
+        reviewed = set()
+        for model in (Review, ArchivedReview):
+            reviewed.update(
+                model.objects.filter(author_id=self.request.user.pk, title_id__in=title_ids)
+                .values_list('title_id', flat=True)
+            )
+        for index, data in items.items():
+            title_id = data['title_id']
+            if title_id not in existing_titles:
+                errors[index] = {'title': ['Произведение не найдено.']}
+            elif title_id in reviewed:
+                errors[index] = {'title': [DUPLICATE_REVIEW_MESSAGE]}
+            reviewed.add(title_id)
+
+    def check_created(self, objects, errors):
+        # Отзыв могли перенести в архив между check_items и вставкой.
+        title_ids = {review.title_id for review in objects.values()}
+        archived = set(
+            ArchivedReview.objects.filter(author_id=self.request.user.pk, title_id__in=title_ids)
+            .values_list('title_id', flat=True)
+        )
+        for index, review in objects.items():
+            if review.title_id in archived:
+                errors[index] = {'title': [DUPLICATE_REVIEW_MESSAGE]}
+
+    def update_aggregates(self, objects):
+        scores = defaultdict(list)
+        for review in objects:
+            scores[review.title_id].append(review.score)
+        for title_id, title_scores in scores.items():
+            aggregates.add_scores(title_id, title_scores)
+
+    def invalidate_cache(self, objects):
+        title_ids = {review.title_id for review in objects}
+        cache.bump_on_commit(
+            cache.TITLES,
+            *(cache.title_namespace(title_id) for title_id in title_ids),
+            *(cache.reviews_namespace(title_id) for title_id in title_ids),
+        )
+
+
+class CommentBulkCreateAPIView(BulkCreateAPIView):
+    """Создает комментарии текущего пользователя к нескольким отзывам."""
+    serializer_class = serializers.CommentBulkSerializer
+    model = Comment
+
+    def check_items(self, items, errors):
+        review_ids = {data['review_id'] for data in items.values()}
+        self.review_titles = dict(Review.objects.filter(pk__in=review_ids).values_list('pk', 'title_id'))
+        archived = ArchivedReview.objects.filter(pk__in=review_ids - set(self.review_titles))
+        for review_id, title_id in archived.values_list('pk', 'title_id'):
+            # Архивный отзыв комментируется после возврата в оперативную таблицу.
+            if restore_review(review_id):
+                self.review_titles[review_id] = title_id
+        for index, data in items.items():
+            if data['review_id'] not in self.review_titles:
+                errors[index] = {'review': ['Отзыв не найден.']}
+
+    def update_aggregates(self, objects):
+        for review_id, count in Counter(comment.review_id for comment in objects).items():
+            aggregates.add_comment(review_id, count)
+
+    def invalidate_cache(self, objects):
+        review_ids = {comment.review_id for comment in objects}
+        title_ids = {self.review_titles[review_id] for review_id in review_ids}
+        cache.bump_on_commit(
+            *(cache.comments_namespace(review_id) for review_id in review_ids),
+            *(cache.reviews_namespace(title_id) for title_id in title_ids),
+        )
@@ -74,6 +74,78 @@ DATABASES = {
     }
 }
 
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Версии прав пользователей для StatelessJWTAuthentication (AUTH_CACHE_ALIAS).
+    # Кэш в памяти процесса: чтение версии не стоит запроса к базе.
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+    },
+}
+
+# Кэш ответов API; подходит и файловый бэкенд
+# (django.core.cache.backends.filebased.FileBasedCache).
+# LocMemCache безопасен только с одним процессом: изменения из другого
+# воркера или команды manage.py этот процесс отдаст в списке произведений
+# лишь после истечения API_CACHE_TIMEOUT (срок кэшированных ответов), а
+# версии для ETag и Last-Modified хранятся без срока и их не увидят вовсе.
+# Для нескольких процессов нужен общий бэкенд: Redis, Memcached или файловый.
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = 60 * 5
+
+# Размер LRU-кэша id -> username в памяти процесса; 0 — выключен.
+# Кэш сбрасывается только в процессе, где изменили пользователя,
+# поэтому при нескольких процессах имена могут устаревать.
+USERNAME_CACHE_SIZE = 0
+
+# Отзывы и комментарии старше этого срока команда archive_old_rows переносит
+# в архивные таблицы; API продолжает отдавать их только для чтения.
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_CHUNK_SIZE = 1000
+
+# Тексты отзывов и комментариев длиннее стольких байт хранятся сжатыми zlib;
+# None — не сжимать. После изменения: python manage.py compress_texts.
+TEXT_COMPRESSION_THRESHOLD = None
+
+# Наибольшее число элементов в одном запросе к reviews/bulk/ и comments/bulk/.
+BULK_CREATE_MAX_ITEMS = 500
+
+# Очередь писем (reviews.outbox). Письма отправляет команда send_outbox;
+# с EMAIL_OUTBOX_EAGER они уходят сразу после фиксации транзакции.
+EMAIL_OUTBOX_EAGER = False
+EMAIL_OUTBOX_WORKERS = 4
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+# Паузы между попытками: 60, 120, 240 ... секунд, но не больше часа.
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 60
+# Через сколько секунд письмо, взятое упавшим обработчиком, снова уходит в очередь.
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 10 * 60
+# Повторная регистрация в течение этого окна (секунд) не ставит новое письмо
+# с кодом: действует уже отправленный код. 0 — отправлять каждый раз.
+# Окно должно быть меньше PASSWORD_RESET_TIMEOUT, срока действия кода.
+# Отметки и счетчики хранятся в таблице reviews.CoalescedEmail и общие
+# для всех воркеров и команд.
+EMAIL_COALESCE_WINDOW = 60
+
+# Кэш версий прав пользователя. Пока версия в токене совпадает с запомненной,
+# пользователь не читается из базы. С LocMemCache смену роли в другом воркере
+# этот процесс увидит только через AUTH_VERSION_CACHE_TIMEOUT; чтобы ее было
+# видно сразу, укажите общий Redis или Memcached. Кэш в базе сюда не подходит:
+# чтение версии из него стоит запроса, как и чтение пользователя.
+AUTH_CACHE_ALIAS = 'auth'
+# Сколько секунд помнится версия прав: окно, в течение которого другие
+# процессы с LocMemCache принимают отозванные права. После истечения токен
+# один раз проверяется по базе, и версия запоминается снова.
+AUTH_VERSION_CACHE_TIMEOUT = 60 * 5
+# Размер LRU-кэша проверенных токенов доступа в памяти процесса; 0 — выключен.
+AUTH_TOKEN_CACHE_SIZE = 10000
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -116,7 +188,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
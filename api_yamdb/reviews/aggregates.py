@@ -0,0 +1,135 @@
+from collections import Counter
+
+from django.db.models import Count, F, Q, Sum
+
+from reviews.models import (SCORE_FIELDS, SCORES, ArchivedComment, ArchivedReview, Comment, Review, Title,
+                            score_field)
+
+# Денормализованные счетчики произведения в порядке значений compute_aggregates().
+AGGREGATE_FIELDS = ('rating_sum', 'rating_count', *SCORE_FIELDS)
+EMPTY_AGGREGATES = (0,) * len(AGGREGATE_FIELDS)
+
+
+def add_score(title_id, score):
+    """Атомарно добавляет оценку к рейтингу и гистограмме произведения."""
+    Title.objects.filter(pk=title_id).update(**{
+        'rating_sum': F('rating_sum') + score,
+        'rating_count': F('rating_count') + 1,
+        score_field(score): F(score_field(score)) + 1,
+    })
+
+
+def add_scores(title_id, scores):
+    """Атомарно добавляет к счетчикам произведения сразу несколько оценок одним UPDATE."""
+    histogram = Counter(scores)
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + sum(scores),
+        rating_count=F('rating_count') + len(scores),
+        **{score_field(score): F(score_field(score)) + count for score, count in histogram.items()},
+    )
+
+
+def remove_score(title_id, score):
+    """Атомарно вычитает оценку из рейтинга и гистограммы произведения."""
+    Title.objects.filter(pk=title_id).update(**{
+        'rating_sum': F('rating_sum') - score,
+        'rating_count': F('rating_count') - 1,
+        score_field(score): F(score_field(score)) - 1,
+    })
+
+
+def change_score(title_id, old_score, new_score):
+    """Атомарно заменяет одну оценку произведения другой одним UPDATE."""
+    Title.objects.filter(pk=title_id).update(**{
+        'rating_sum': F('rating_sum') + (new_score - old_score),
+        score_field(old_score): F(score_field(old_score)) - 1,
+        score_field(new_score): F(score_field(new_score)) + 1,
+    })
+
+
+def compute_aggregates(title_ids=None):
+    """Считает счетчики заново по отзывам, включая архивные: {title_id: значения AGGREGATE_FIELDS}."""
+    result = {}
+    for model in (Review, ArchivedReview):
+        reviews = model.objects.order_by()
+        if title_ids is not None:
+            reviews = reviews.filter(title_id__in=title_ids)
+        rows = reviews.values('title_id').annotate(
+            rating_sum=Sum('score'),
+            rating_count=Count('id'),
+            **{score_field(score): Count('id', filter=Q(score=score)) for score in SCORES},
+        )
+        for row in rows:
+            values = tuple(row[name] for name in AGGREGATE_FIELDS)
+            previous = result.get(row['title_id'], EMPTY_AGGREGATES)
+            result[row['title_id']] = tuple(map(sum, zip(previous, values)))
+    return result
+
+
+def recompute_title_rating(title_id):
+    """Пересчитывает счетчики одного произведения."""
+    values = compute_aggregates([title_id]).get(title_id, EMPTY_AGGREGATES)
+    Title.objects.filter(pk=title_id).update(**dict(zip(AGGREGATE_FIELDS, values)))
+
+
+def find_rating_drift():
+    """Возвращает произведения, у которых сохраненные счетчики расходятся с отзывами.
+
+    Результат — список кортежей (title_id, сохранено, должно быть), где
+    сохранено и должно быть — словари {поле: значение} только с
+    расходящимися полями из AGGREGATE_FIELDS.
+    """
+    actual = compute_aggregates()
+    drift = []
+    stored = Title.objects.order_by('pk').values_list('pk', *AGGREGATE_FIELDS)
+    for title_id, *values in stored.iterator():
+        expected = actual.get(title_id, EMPTY_AGGREGATES)
+        changed = [
+            (name, value, expected_value)
+            for name, value, expected_value in zip(AGGREGATE_FIELDS, values, expected)
+            if value != expected_value
+        ]
+        if changed:
+            drift.append((
+                title_id,
+                {name: value for name, value, _ in changed},
+                {name: expected_value for name, _, expected_value in changed},
+            ))
+    return drift
+
+
+def add_comment(review_id, count=1):
+    """Атомарно увеличивает счетчик комментариев отзыва."""
+    Review.objects.filter(pk=review_id).update(comments_count=F('comments_count') + count)
+
+
+def remove_comment(review_id):
+    """Атомарно уменьшает счетчик комментариев отзыва."""
+    Review.objects.filter(pk=review_id).update(comments_count=F('comments_count') - 1)
+
+
+def remove_archived_comment(review_id):
+    """Уменьшает счетчик отзыва после удаления архивного комментария: отзыв может быть и в архиве."""
+    remove_comment(review_id)
+    ArchivedReview.objects.filter(pk=review_id).update(comments_count=F('comments_count') - 1)
+
+
+def find_comments_count_drift():
+    """Возвращает отзывы, у которых comments_count расходится с таблицами комментариев.
+
+    Проверяются и оперативные, и архивные отзывы. Результат — список
+    кортежей (review_id, сохранено, должно быть).
+    """
+    actual = {}
+    for model in (Comment, ArchivedComment):
+        for row in model.objects.order_by().values('review_id').annotate(count=Count('id')):
+            actual[row['review_id']] = actual.get(row['review_id'], 0) + row['count']
+    drift = []
+    for model in (Review, ArchivedReview):
+        stored = model.objects.order_by('pk').values_list('pk', 'comments_count')
+        drift.extend(
+            (review_id, comments_count, actual.get(review_id, 0))
+            for review_id, comments_count in stored.iterator()
+            if comments_count != actual.get(review_id, 0)
+        )
+    return drift
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     name = 'reviews'
     verbose_name = 'Управление пользователями, произведениями, отзывами и комментариями к ним на сайте'
+
+    def ready(self):
+        from reviews import signals  # noqa: F401
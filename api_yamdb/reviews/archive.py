@@ -0,0 +1,172 @@
+from django.db import connection, transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q
+from django.utils.functional import cached_property
+
+from reviews.models import ArchivedComment, ArchivedReview, Comment, Review
+
+
+def concrete_attnames(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+class ReadThroughQuerySet:
+    """Оперативные и архивные строки одной выборкой, как будто это одна таблица.
+
+    Поддерживает то, что нужно пагинации и get_object_or_404: filter(),
+    order_by(), count(), срезы, get() и values_list(). Фильтры применяются к
+    обеим частям; объекты создаются моделью оперативной части. Изменять
+    архивные строки через такие объекты нельзя.
+
+    Срез, который целиком лежит среди оперативных строк, идущих по первому
+    полю ordering раньше всех архивных, читается только из оперативной
+    таблицы. UNION ALL с архивом нужен лишь страницам за этими строками.
+    count() складывает количества строк обеих таблиц.
+    """
+
+    def __init__(self, hot, cold, ordering=None):
+        self.hot = hot
+        self.cold = cold
+        self.model = hot.model
+        self.ordering = tuple(ordering or hot.query.order_by or self.model._meta.ordering)
+
+    def _clone(self, hot=None, cold=None, ordering=None):
+        return ReadThroughQuerySet(
+            self.hot if hot is None else hot,
+            self.cold if cold is None else cold,
+            ordering or self.ordering,
+        )
+
+    @property
+    def ordered(self):
+        return bool(self.ordering)
+
+    def filter(self, *args, **kwargs):
+        return self._clone(self.hot.filter(*args, **kwargs), self.cold.filter(*args, **kwargs))
+
+    def order_by(self, *fields):
+        return self._clone(ordering=fields)
+
+    def union(self):
+        """Объекты модели оперативной части по обеим таблицам."""
+        cold = self.cold.values_list(*concrete_attnames(self.model))
+        return self.hot.order_by().union(cold.order_by(), all=True).order_by(*self.ordering)
+
+    def values_list(self, *fields):
+        hot = self.hot.order_by().values_list(*fields)
+        cold = self.cold.order_by().values_list(*fields)
+        return hot.union(cold, all=True).order_by(*self.ordering)
+
+    @cached_property
+    def counts(self):
+        """Строк в оперативной части, в архивной и оперативных строк раньше всех архивных."""
+        field = self.ordering[0] if self.ordering else None
+        name = field.lstrip('-') if isinstance(field, str) and field != '?' else None
+        descending = name is not None and field.startswith('-')
+        cold_aggregates = {'count': Count('pk')}
+        if name:
+            cold_aggregates['bound'] = Max(name) if descending else Min(name)
+        cold = self.cold.order_by().aggregate(**cold_aggregates)
+        hot_aggregates = {'count': Count('pk')}
+        if cold['count'] and name:
+            lookup = f'{name}__gt' if descending else f'{name}__lt'
+            hot_aggregates['ahead'] = Count('pk', filter=Q(**{lookup: cold['bound']}))
+        hot = self.hot.order_by().aggregate(**hot_aggregates)
+        ahead = hot.get('ahead', 0) if cold['count'] else hot['count']
+        return hot['count'], cold['count'], ahead
+
+    def count(self):
+        hot_count, cold_count, _ = self.counts
+        return hot_count + cold_count
+
+    def get(self, *args, **kwargs):
+        rows = list(self.filter(*args, **kwargs).union()[:2])
+        if not rows:
+            raise self.model.DoesNotExist(f'{self.model._meta.object_name} matching query does not exist.')
+        if len(rows) > 1:
+            raise self.model.MultipleObjectsReturned(f'get() returned more than one {self.model._meta.object_name}')
+        return rows[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice) and key.step is None and key.stop is not None:
+            if key.stop <= self.counts[2]:
+                return self.hot.order_by(*self.ordering)[key]
+        return self.union()[key]
+
+    def __iter__(self):
+        return iter(self.union())
+
+
+def read_through_reviews(**lookups):
+    """Отзывы вместе с архивными; lookups должны подходить обеим таблицам."""
+    return ReadThroughQuerySet(Review.objects.filter(**lookups), ArchivedReview.objects.filter(**lookups))
+
+
+def read_through_comments(**lookups):
+    """Комментарии вместе с архивными; lookups должны подходить обеим таблицам."""
+    return ReadThroughQuerySet(Comment.objects.filter(**lookups), ArchivedComment.objects.filter(**lookups))
+
+
+def archive_comments(cutoff, chunk_size):
+    """Переносит в архив порцию комментариев старше cutoff; возвращает их число."""
+    attnames = concrete_attnames(Comment)
+    with transaction.atomic():
+        rows = list(
+            Comment.objects.filter(pub_date__lt=cutoff).order_by('pk').values_list(*attnames)[:chunk_size]
+        )
+        if rows:
+            ArchivedComment.objects.bulk_create(ArchivedComment(**dict(zip(attnames, row))) for row in rows)
+            # Без сигналов: счетчик comments_count отзыва учитывает и архив.
+            Comment.objects.filter(pk__in=[row[0] for row in rows])._raw_delete(Comment.objects.db)
+    return len(rows)
+
+
+def archive_reviews(cutoff, chunk_size):
+    """Переносит в архив порцию отзывов старше cutoff без оперативных комментариев."""
+    attnames = concrete_attnames(Review)
+    with transaction.atomic():
+        rows = list(
+            Review.objects.filter(pub_date__lt=cutoff)
+            .filter(~Exists(Comment.objects.filter(review_id=OuterRef('pk'))))
+            .order_by('pk').values_list(*attnames)[:chunk_size]
+        )
+        if rows:
+            ArchivedReview.objects.bulk_create(ArchivedReview(**dict(zip(attnames, row))) for row in rows)
+            # Без сигналов: рейтинг произведения учитывает и архивные отзывы.
+            Review.objects.filter(pk__in=[row[0] for row in rows])._raw_delete(Review.objects.db)
+    return len(rows)
+
+
+def _restore(archived_model, model, pk):
+    """Переносит архивную строку обратно в оперативную таблицу без сигналов.
+
+    INSERT ... SELECT сохраняет pub_date (auto_now_add не срабатывает) и
+    сжатый текст как есть; рейтинги и счетчики уже учитывают строку.
+    """
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in model._meta.concrete_fields)
+    with transaction.atomic():
+        # Блокировка: параллельный перенос той же строки дождется этого и ничего не найдет.
+        if not archived_model.objects.select_for_update().filter(pk=pk).exists():
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) '
+                f'SELECT {columns} FROM {connection.ops.quote_name(archived_model._meta.db_table)} WHERE id = %s',
+                [pk],
+            )
+        archived_model.objects.filter(pk=pk)._raw_delete(archived_model.objects.db)
+    return True
+
+
+def restore_review(pk):
+    """Возвращает архивный отзыв в reviews_review перед изменением или удалением."""
+    return _restore(ArchivedReview, Review, pk)
+
+
+def restore_comment(pk):
+    """Возвращает архивный комментарий в reviews_comment вместе с его отзывом."""
+    review_id = ArchivedComment.objects.filter(pk=pk).values_list('review_id', flat=True).first()
+    if review_id is None:
+        return False
+    with transaction.atomic():
+        restore_review(review_id)
+        return _restore(ArchivedComment, Comment, pk)
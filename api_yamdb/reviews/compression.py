@@ -0,0 +1,111 @@
+import base64
+import zlib
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+# Признак сжатого значения. Текст, который сам начинается с него, сжимается
+# всегда, поэтому хранимое значение читается однозначно.
+COMPRESSED_PREFIX = '\x1bzlib:'
+
+
+def compress(value):
+    data = zlib.compress(value.encode('utf-8'), 9)
+    return COMPRESSED_PREFIX + base64.b64encode(data).decode('ascii')
+
+
+def decompress(stored):
+    data = base64.b64decode(stored[len(COMPRESSED_PREFIX):])
+    return zlib.decompress(data).decode('utf-8')
+
+
+def to_storage(value):
+    """Хранимое значение по настройке TEXT_COMPRESSION_THRESHOLD (байт; None — не сжимать)."""
+    if isinstance(value, CompressedText):
+        return value.stored
+    if isinstance(value, StoredText):
+        return str(value)
+    if value is None:
+        return None
+    value = str(value)
+    if value.startswith(COMPRESSED_PREFIX):
+        return compress(value)
+    threshold = settings.TEXT_COMPRESSION_THRESHOLD
+    size = len(value.encode('utf-8'))
+    if threshold is None or size < threshold:
+        return value
+    # Сжатое значение — ASCII, поэтому его длина в символах равна длине в байтах.
+    stored = compress(value)
+    return stored if len(stored) < size else value
+
+
+def inflate(value):
+    """Текст для вывода: сжатое значение из базы распаковывается, остальное — как есть."""
+    if isinstance(value, StoredText):
+        return CompressedText(value)
+    return value
+
+
+class StoredText(str):
+    """Сжатое значение в том виде, в каком оно лежит в базе, еще не распакованное.
+
+    Такое значение записывается обратно без повторного сжатия; текст из него
+    получает inflate().
+    """
+
+
+class CompressedText(str):
+    """Распакованный текст, который помнит сжатое значение из базы.
+
+    Это обычная строка; сохранение без изменений записывает stored обратно
+    без повторного сжатия. Любая операция над строкой дает простой str.
+    """
+
+    def __new__(cls, stored):
+        text = super().__new__(cls, decompress(stored))
+        text.stored = str(stored)
+        return text
+
+    def __reduce__(self):
+        return CompressedText, (self.stored,)
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Распаковывает значение при первом обращении к атрибуту модели."""
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if isinstance(value, StoredText):
+            value = instance.__dict__[self.field.attname] = CompressedText(value)
+        return value
+
+    def __set__(self, instance, value):
+        # С __set__ дескриптор вызывается и тогда, когда значение уже в __dict__.
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """Текст, который дольше TEXT_COMPRESSION_THRESHOLD байт хранится сжатым zlib.
+
+    Столбец остается текстовым (base64 после префикса), поэтому поле можно
+    включить без изменения схемы, а строки пересжать командой compress_texts.
+    Из базы читается StoredText без распаковки: объекты, загруженные для
+    проверки прав или подсчетов, zlib не трогают. Текст распаковывается при
+    обращении к атрибуту модели, а в values_list() — функцией inflate().
+    """
+    descriptor_class = CompressedTextDescriptor
+
+    def from_db_value(self, value, expression, connection):
+        if value is not None and value.startswith(COMPRESSED_PREFIX):
+            return StoredText(value)
+        return value
+
+    def pre_save(self, model_instance, add):
+        # Неизмененное значение сохраняется, не распаковываясь.
+        if self.attname in model_instance.__dict__:
+            return model_instance.__dict__[self.attname]
+        return super().pre_save(model_instance, add)
+
+    def get_prep_value(self, value):
+        return to_storage(value)
@@ -0,0 +1,58 @@
+"""Полнотекстовый индекс reviews_title_fts по названиям произведений (только SQLite).
+
+Индекс внешний (content='reviews_title') и поддерживается триггерами. Когда
+SQLite меняет столбцы reviews_title, Django пересоздает таблицу, и триггеры
+пропадают вместе со старой таблицей. Поэтому миграция, которая меняет
+столбцы Title, должна закончиться RunPython(rebuild_fts, ...).
+"""
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+    'DROP TABLE IF EXISTS reviews_title_fts',
+)
+
+
+def create_sql(column):
+    """Создание индекса и триггеров по столбцу column таблицы reviews_title."""
+    return (
+        f'''CREATE VIRTUAL TABLE reviews_title_fts USING fts5(
+            {column}, content='reviews_title', content_rowid='id', tokenize='trigram'
+        )''',
+        f'''CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title BEGIN
+            INSERT INTO reviews_title_fts(rowid, {column}) VALUES (new.id, new.{column});
+        END''',
+        f'''CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title BEGIN
+            INSERT INTO reviews_title_fts(reviews_title_fts, rowid, {column})
+            VALUES ('delete', old.id, old.{column});
+        END''',
+        f'''CREATE TRIGGER reviews_title_fts_update AFTER UPDATE OF {column} ON reviews_title BEGIN
+            INSERT INTO reviews_title_fts(reviews_title_fts, rowid, {column})
+            VALUES ('delete', old.id, old.{column});
+            INSERT INTO reviews_title_fts(rowid, {column}) VALUES (new.id, new.{column});
+        END''',
+        "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+    )
+
+
+def _execute(schema_editor, statements):
+    # Полнотекстовый индекс есть только в SQLite, на других базах поиск идет по LIKE.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def rebuild_fts(apps, schema_editor):
+    """Создает заново индекс и триггеры по нормализованному названию."""
+    _execute(schema_editor, DROP_SQL + create_sql('name_normalized'))
+
+
+def rebuild_name_fts(apps, schema_editor):
+    """Индекс по исходному названию, как до появления name_normalized."""
+    _execute(schema_editor, DROP_SQL + create_sql('name'))
+
+
+def drop_fts(apps, schema_editor):
+    _execute(schema_editor, DROP_SQL)
@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reviews.archive import archive_comments, archive_reviews
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит старые комментарии и отзывы в архивные таблицы порциями, '
+        'каждая порция — в своей короткой транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать строки старше стольких дней.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.ARCHIVE_CHUNK_SIZE,
+            help='Сколько строк переносить одной транзакцией.',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Пауза между порциями в секундах, чтобы не мешать записи из API.',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['chunk_size'] < 1:
+            raise CommandError('--days не может быть отрицательным, --chunk-size должен быть больше нуля.')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # Сначала комментарии: отзыв переносится, только когда у него не осталось
+        # оперативных комментариев.
+        comments = self.run(archive_comments, cutoff, options)
+        reviews = self.run(archive_reviews, cutoff, options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив: комментариев {comments}, отзывов {reviews}.'
+        ))
+
+    def run(self, archive_chunk, cutoff, options):
+        total = 0
+        while True:
+            moved = archive_chunk(cutoff, options['chunk_size'])
+            total += moved
+            if moved < options['chunk_size']:
+                return total
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'{archive_chunk.__name__}: {total}')
+            time.sleep(options['pause'])
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.compression import inflate, to_storage
+from reviews.models import ArchivedComment, ArchivedReview, Comment, Review
+
+COMPRESSED_FIELDS = (
+    (Review, 'text'),
+    (Comment, 'text'),
+    (ArchivedReview, 'text'),
+    (ArchivedComment, 'text'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Приводит хранение текстов отзывов и комментариев к TEXT_COMPRESSION_THRESHOLD: '
+        'сжимает длинные и распаковывает лишние, порциями в коротких транзакциях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько строк читать одной транзакцией.',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Пауза между порциями в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше нуля.')
+        threshold = settings.TEXT_COMPRESSION_THRESHOLD
+        self.stdout.write(f'TEXT_COMPRESSION_THRESHOLD = {threshold}')
+        for model, field_name in COMPRESSED_FIELDS:
+            changed, saved = self.convert(model, field_name, options['chunk_size'], options['pause'])
+            self.stdout.write(
+                f'{model._meta.label}.{field_name}: изменено строк {changed}, сэкономлено байт {saved}'
+            )
+        self.stdout.write(self.style.SUCCESS('Готово.'))
+
+    def convert(self, model, field_name, chunk_size, pause):
+        changed = saved = 0
+        last_pk = None
+        while True:
+            rows = model.objects.order_by('pk').values_list('pk', field_name)
+            if last_pk is not None:
+                rows = rows.filter(pk__gt=last_pk)
+            with transaction.atomic():
+                rows = list(rows[:chunk_size])
+                updates = []
+                for pk, stored in rows:
+                    text = None if stored is None else str(inflate(stored))
+                    target = to_storage(text)
+                    if target != stored:
+                        updates.append(model(pk=pk, **{field_name: text}))
+                        saved += len(stored.encode('utf-8')) - len(target.encode('utf-8'))
+                model.objects.bulk_update(updates, [field_name])
+            changed += len(updates)
+            if len(rows) < chunk_size:
+                return changed, saved
+            last_pk = rows[-1][0]
+            time.sleep(pause)
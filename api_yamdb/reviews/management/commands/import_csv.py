@@ -0,0 +1,163 @@
+import csv
+import time
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import notify_bulk_changed
+
+
+def _nullable(value):
+    return value or None
+
+
+def user_from_row(row):
+    return User(
+        id=row['id'],
+        username=row['username'],
+        email=row['email'],
+        role=row['role'] or User.USER,
+        bio=_nullable(row['bio']),
+        first_name=row['first_name'],
+        last_name=row['last_name'],
+        password=UNUSABLE_PASSWORD_PREFIX,
+    )
+
+
+def category_from_row(row):
+    return Category(id=row['id'], name=row['name'], slug=row['slug'])
+
+
+def genre_from_row(row):
+    return Genre(id=row['id'], name=row['name'], slug=row['slug'])
+
+
+def title_from_row(row):
+    return Title(id=row['id'], name=row['name'], year=row['year'], category_id=_nullable(row['category']))
+
+
+def genre_title_from_row(row):
+    return Title.genre.through(id=row['id'], title_id=row['title_id'], genre_id=row['genre_id'])
+
+
+def review_from_row(row):
+    return Review(
+        id=row['id'],
+        title_id=row['title_id'],
+        text=row['text'],
+        author_id=row['author'],
+        score=row['score'],
+        pub_date=parse_datetime(row['pub_date']),
+    )
+
+
+def comment_from_row(row):
+    return Comment(
+        id=row['id'],
+        review_id=row['review_id'],
+        text=row['text'],
+        author_id=row['author'],
+        pub_date=parse_datetime(row['pub_date']),
+    )
+
+
+# Порядок важен: каждый файл ссылается только на уже загруженные.
+SOURCES = (
+    ('users.csv', User, user_from_row),
+    ('category.csv', Category, category_from_row),
+    ('genre.csv', Genre, genre_from_row),
+    ('titles.csv', Title, title_from_row),
+    ('genre_title.csv', Title.genre.through, genre_title_from_row),
+    ('review.csv', Review, review_from_row),
+    ('comments.csv', Comment, comment_from_row),
+)
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Сохраняет даты из файла: bulk_create иначе подставит текущее время."""
+    fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов static/data в базу одной транзакцией.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=str(Path(settings.BASE_DIR) / 'static' / 'data'),
+            help='Каталог с CSV-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Сколько строк вставлять одним bulk_create.',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        missing = [name for name, _, _ in SOURCES if not (path / name).is_file()]
+        if missing:
+            raise CommandError(f'В {path} нет файлов: {", ".join(missing)}')
+
+        started = time.perf_counter()
+        total = 0
+        with transaction.atomic():
+            for name, model, from_row in SOURCES:
+                total += self.load(path / name, model, from_row, options['batch_size'])
+            self.reset_sequences()
+            # bulk_create не вызывает сигналы, поэтому счетчики пересчитываются целиком.
+            call_command('recompute_aggregates', verbosity=0, stdout=self.stdout)
+        warnings = notify_bulk_changed(self.__class__)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {total} за {elapsed:.1f} с ({total / max(elapsed, 1e-9):.0f} строк/с).'
+        ))
+        for warning in warnings:
+            self.stdout.write(self.style.WARNING(warning))
+
+    def load(self, file_path, model, from_row, batch_size):
+        started = time.perf_counter()
+        count = 0
+        with open(file_path, encoding='utf-8', newline='') as csv_file, keep_auto_now_add(model):
+            objects = map(from_row, csv.DictReader(csv_file))
+            for batch in batches(objects, batch_size):
+                model.objects.bulk_create(batch, batch_size=batch_size)
+                count += len(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{file_path.name}: {count} строк за {elapsed:.2f} с ({count / max(elapsed, 1e-9):.0f} строк/с)'
+        )
+        return count
+
+    def reset_sequences(self):
+        models = [model for _, model, _ in SOURCES]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.aggregates import find_comments_count_drift, find_rating_drift
+from reviews.models import ArchivedReview, Review, Title
+from reviews.signals import notify_bulk_changed
+
+
+def format_counters(counters):
+    return ' '.join(f'{name}={value}' for name, value in counters.items())
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные рейтинги и гистограммы оценок произведений, '
+        'счетчики комментариев отзывов и сообщает о расхождениях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сообщить о расхождениях, ничего не исправляя.',
+        )
+
+    def handle(self, *args, **options):
+        self.verbose = options['verbosity'] >= 1
+        self.repair = not options['check']
+        with transaction.atomic():
+            drift = self.fix_ratings() + self.fix_comments_counts()
+        if drift and self.repair:
+            # update() не вызывает сигналы моделей: кэши и ETag сбрасываются целиком.
+            for warning in notify_bulk_changed(self.__class__):
+                self.report(self.style.WARNING(warning))
+        if not drift:
+            self.report(self.style.SUCCESS('Расхождений нет.'))
+        elif not self.repair:
+            self.report(self.style.WARNING(f'Расхождений: {len(drift)}.'))
+        else:
+            self.report(self.style.SUCCESS(f'Исправлено расхождений: {len(drift)}.'))
+
+    def report(self, message):
+        if self.verbose:
+            self.stdout.write(message)
+
+    def fix_ratings(self):
+        drift = find_rating_drift()
+        for title_id, stored, expected in drift:
+            self.report(
+                f'title={title_id}: сохранено {format_counters(stored)}, '
+                f'по отзывам {format_counters(expected)}'
+            )
+            if self.repair:
+                Title.objects.filter(pk=title_id).update(**expected)
+        return drift
+
+    def fix_comments_counts(self):
+        drift = find_comments_count_drift()
+        for review_id, stored, expected in drift:
+            self.report(
+                f'review={review_id}: сохранено comments_count={stored}, '
+                f'по комментариям comments_count={expected}'
+            )
+            if self.repair:
+                for model in (Review, ArchivedReview):
+                    model.objects.filter(pk=review_id).update(comments_count=expected)
+        return drift
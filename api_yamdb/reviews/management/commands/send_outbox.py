@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.outbox import coalesce_stats, drain, queue_depth
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пулом потоков и сообщает размер очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.EMAIL_OUTBOX_WORKERS,
+            help='Сколько потоков отправляют письма одновременно.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Сколько писем отправлять через одно SMTP-соединение.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь каждые --interval секунд.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза между проверками очереди в режиме --loop.',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Только показать размер очереди.',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers и --batch-size должны быть больше нуля.')
+        if options['stats']:
+            self.write_depth()
+            return
+        while True:
+            sent = drain(options['workers'], options['batch_size'])
+            if sent or not options['loop']:
+                self.stdout.write(f'Отправлено писем: {sent}.')
+                self.write_depth()
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def write_depth(self):
+        depth = queue_depth()
+        self.stdout.write(
+            f'Очередь: ожидают {depth["pending"]}, отправляются {depth["sending"]}, '
+            f'отправлено {depth["sent"]}, не отправлено {depth["failed"]}; '
+            f'готовы к отправке {depth["due"]}, самое старое ждет {depth["oldest_due_seconds"]:.0f} с.'
+        )
+        stats = coalesce_stats()
+        self.stdout.write(
+            f'Повторные письма: поставлено {stats["sent"]}, подавлено {stats["suppressed"]}.'
+        )
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+FTS_SQL = (
+    '''CREATE VIRTUAL TABLE reviews_title_fts USING fts5(
+        name, content='reviews_title', content_rowid='id', tokenize='trigram'
+    )''',
+    '''CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(rowid, name) VALUES (new.id, new.name);
+    END''',
+    '''CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END''',
+    '''CREATE TRIGGER reviews_title_fts_update AFTER UPDATE OF name ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO reviews_title_fts(rowid, name) VALUES (new.id, new.name);
+    END''',
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+    'DROP TABLE IF EXISTS reviews_title_fts',
+)
+
+
+def execute(statements):
+    def run(apps, schema_editor):
+        # Полнотекстовый индекс есть только в SQLite, на других базах поиск идет по LIKE.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(execute(FTS_SQL), execute(DROP_SQL)),
+    ]
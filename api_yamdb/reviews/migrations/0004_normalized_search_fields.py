@@ -0,0 +1,71 @@
+# Generated by Django 3.2 on 2026-10-18 19:38
+
+from django.db import migrations
+import reviews.models
+import reviews.normalization
+from reviews.fts import drop_fts, rebuild_fts, rebuild_name_fts
+from reviews.normalization import normalize
+
+BATCH_SIZE = 2000
+
+SHADOW_FIELDS = (
+    ('Category', 'name_normalized', 'name'),
+    ('Genre', 'name_normalized', 'name'),
+    ('Title', 'name_normalized', 'name'),
+    ('User', 'username_normalized', 'username'),
+)
+
+
+def fill_shadow_fields(apps, schema_editor):
+    for model_name, shadow, source in SHADOW_FIELDS:
+        model = apps.get_model('reviews', model_name)
+        batch = []
+        for obj in model.objects.only('pk', source).iterator(chunk_size=BATCH_SIZE):
+            setattr(obj, shadow, normalize(getattr(obj, source)))
+            batch.append(obj)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(batch, [shadow])
+                batch = []
+        model.objects.bulk_update(batch, [shadow])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_name_fts'),
+    ]
+
+    operations = [
+        # При откате индекс по name возвращается после удаления столбцов name_normalized.
+        migrations.RunPython(migrations.RunPython.noop, rebuild_name_fts),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', reviews.models.NormalizedUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='name_normalized',
+            field=reviews.normalization.NormalizedTextField(db_index=True, default='', editable=False, source='name', verbose_name='название категории для поиска'),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='name_normalized',
+            field=reviews.normalization.NormalizedTextField(db_index=True, default='', editable=False, source='name', verbose_name='название жанра для поиска'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='name_normalized',
+            field=reviews.normalization.NormalizedTextField(db_index=True, default='', editable=False, source='name', verbose_name='произведение для поиска'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_normalized',
+            field=reviews.normalization.NormalizedTextField(db_index=True, default='', editable=False, source='username', verbose_name='никнейм для поиска'),
+        ),
+        migrations.RunPython(fill_shadow_fields, migrations.RunPython.noop),
+        # Полнотекстовый индекс строится по нормализованному названию,
+        # чтобы совпадать по правилам с коротким поиском по name_normalized.
+        migrations.RunPython(rebuild_fts, drop_fts),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 3.2 on 2026-10-18 19:51
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+from reviews.fts import rebuild_fts
+
+
+def fill_score_histogram(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    names = {score: f'score_{score}_count' for score in range(1, 11)}
+    rows = Review.objects.order_by().values('title_id').annotate(
+        **{name: Count('id', filter=Q(score=score)) for score, name in names.items()}
+    )
+    for row in rows:
+        Title.objects.filter(pk=row['title_id']).update(**{name: row[name] for name in names.values()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_access_path_indexes'),
+    ]
+
+    # SQLite добавляет и удаляет столбцы пересозданием reviews_title и теряет
+    # триггеры полнотекстового индекса, поэтому индекс создается заново
+    # после изменения столбцов в обе стороны.
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, rebuild_fts),
+        migrations.AddField(
+            model_name='title',
+            name='score_10_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 10'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 1'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 2'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 3'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 4'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 5'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 6'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 7'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 8'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='оценок 9'),
+        ),
+        migrations.RunPython(rebuild_fts, migrations.RunPython.noop),
+        migrations.RunPython(fill_score_histogram, migrations.RunPython.noop),
+    ]
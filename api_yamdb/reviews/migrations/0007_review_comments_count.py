@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 19:55
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_comments_count(apps, schema_editor):
+    Comment = apps.get_model('reviews', 'Comment')
+    Review = apps.get_model('reviews', 'Review')
+    rows = Comment.objects.order_by().values('review_id').annotate(count=Count('id'))
+    for row in rows:
+        Review.objects.filter(pk=row['review_id']).update(comments_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='количество комментариев'),
+        ),
+        migrations.RunPython(fill_comments_count, migrations.RunPython.noop),
+    ]
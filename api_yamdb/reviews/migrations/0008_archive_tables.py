@@ -0,0 +1,59 @@
+# Generated by Django 3.2 on 2026-10-18 19:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_review_comments_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedReview',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField(verbose_name='текст отзыва')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='оценка произведения')),
+                ('pub_date', models.DateTimeField(verbose_name='дата публикации отзыва')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='количество комментариев')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to=settings.AUTH_USER_MODEL, verbose_name='автор отзыва')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to='reviews.title', verbose_name='произведение')),
+            ],
+            options={
+                'verbose_name': 'Архивный отзыв',
+                'verbose_name_plural': 'Архивные отзывы',
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField(verbose_name='текст комментария')),
+                ('pub_date', models.DateTimeField(verbose_name='дата публикации комментария')),
+                ('review_id', models.IntegerField(verbose_name='отзыв')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL, verbose_name='автор комментария')),
+            ],
+            options={
+                'verbose_name': 'Архивный комментарий',
+                'verbose_name_plural': 'Архивные комментарии',
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedreview',
+            index=models.Index(fields=['title', '-pub_date'], name='archived_review_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedreview',
+            index=models.Index(fields=['author', 'title'], name='archived_review_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['review_id', '-pub_date'], name='archived_comment_review_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-18 20:03
+
+from django.db import migrations
+import reviews.compression
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_archive_tables'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedcomment',
+            name='text',
+            field=reviews.compression.CompressedTextField(verbose_name='текст комментария'),
+        ),
+        migrations.AlterField(
+            model_name='archivedreview',
+            name='text',
+            field=reviews.compression.CompressedTextField(verbose_name='текст отзыва'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='text',
+            field=reviews.compression.CompressedTextField(verbose_name='текст комментария'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='text',
+            field=reviews.compression.CompressedTextField(verbose_name='текст отзыва'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 20:04
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_compressed_texts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.TextField(verbose_name='тема')),
+                ('body', models.TextField(verbose_name='текст')),
+                ('from_email', models.TextField(blank=True, null=True, verbose_name='отправитель')),
+                ('to', models.JSONField(verbose_name='получатели')),
+                ('status', models.CharField(choices=[('pending', 'ожидает отправки'), ('sending', 'отправляется'), ('sent', 'отправлено'), ('failed', 'не отправлено')], default='pending', max_length=10, verbose_name='статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='попыток отправки')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='следующая попытка')),
+                ('claim_token', models.CharField(blank=True, default='', max_length=32, verbose_name='метка обработчика')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='взято в работу')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='поставлено в очередь')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='отправлено')),
+            ],
+            options={
+                'verbose_name': 'Письмо в очереди',
+                'verbose_name_plural': 'Очередь писем',
+                'ordering': ['next_attempt_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(fields=['claim_token'], name='outbox_claim_token_idx'),
+        ),
+    ]
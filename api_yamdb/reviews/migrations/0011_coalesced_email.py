@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 21:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_outbox_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoalescedEmail',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='ключ')),
+                ('claim', models.CharField(max_length=32, verbose_name='метка захвата')),
+                ('expires_at', models.DateTimeField(verbose_name='окно до')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='поставлено писем')),
+                ('suppressed', models.PositiveIntegerField(default=0, verbose_name='подавлено писем')),
+                ('email', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reviews.outboxemail', verbose_name='письмо')),
+            ],
+            options={
+                'verbose_name': 'Отметка повторных писем',
+                'verbose_name_plural': 'Отметки повторных писем',
+            },
+        ),
+    ]
@@ -1,9 +1,45 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models.expressions import RawSQL
+from django.dispatch import Signal
+from django.utils import timezone
 
+from reviews.compression import CompressedTextField
+from reviews.normalization import NormalizedModelMixin, NormalizedQuerySet, NormalizedTextField, normalize
 
-class User(AbstractUser):
+
+# Отправляется после update() и bulk_update() пользователей, которые меняют
+# поля прав в обход сигналов модели; pks — id затронутых пользователей.
+users_updated = Signal()
+
+
+class UserQuerySet(NormalizedQuerySet):
+    # Поля, от которых зависят права пользователя.
+    AUTH_FIELDS = frozenset(('role', 'is_staff', 'is_superuser', 'is_active'))
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        if self.AUTH_FIELDS.intersection(fields):
+            users_updated.send(sender=self.model, pks=[obj.pk for obj in objs])
+        return rows
+
+    def update(self, **kwargs):
+        if not self.AUTH_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+        users_updated.send(sender=self.model, pks=pks)
+        return rows
+
+
+class NormalizedUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
+class User(NormalizedModelMixin, AbstractUser):
     """Содержит пользователей."""
     USER = 'user'
     MODERATOR = 'moderator'
@@ -18,6 +54,9 @@ class User(AbstractUser):
     email = models.EmailField(verbose_name='email', max_length=254, unique=True)
     bio = models.TextField(verbose_name='биография', null=True)
     role = models.CharField(verbose_name='роль', max_length=10, choices=ROLE_CHOICES, default=USER)
+    username_normalized = NormalizedTextField(verbose_name='никнейм для поиска', source='username')
+
+    objects = NormalizedUserManager()
 
     @property
     def is_moderator(self):
@@ -35,11 +74,28 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_username()
+        return instance
+
+    def _remember_username(self):
+        """Запоминает имя, уже показанное в отзывах и комментариях."""
+        self._saved_username = self.__dict__.get('username')
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_username()
 
-class Category(models.Model):
+
+class Category(NormalizedModelMixin, models.Model):
     """Содержит категории произведений."""
     name = models.CharField(verbose_name='название категории', max_length=256)
     slug = models.SlugField(verbose_name='сокращение категории', unique=True, max_length=50)
+    name_normalized = NormalizedTextField(verbose_name='название категории для поиска', source='name')
+
+    objects = NormalizedQuerySet.as_manager()
 
     class Meta:
         ordering = ['name']
@@ -50,10 +106,13 @@ class Category(models.Model):
         return self.name
 
 
-class Genre(models.Model):
+class Genre(NormalizedModelMixin, models.Model):
     """Содержит жанры произведений."""
     name = models.CharField(verbose_name='название жанра', max_length=256)
     slug = models.SlugField(verbose_name='сокращение жанра', unique=True, max_length=50)
+    name_normalized = NormalizedTextField(verbose_name='название жанра для поиска', source='name')
+
+    objects = NormalizedQuerySet.as_manager()
 
     class Meta:
         ordering = ['name']
@@ -64,9 +123,59 @@ class Genre(models.Model):
         return self.slug
 
 
-class Title(models.Model):
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    """Имя счетчика оценок score в гистограмме произведения."""
+    return f'score_{score}_count'
+
+
+SCORE_FIELDS = tuple(score_field(score) for score in SCORES)
+
+
+class TitleQuerySet(NormalizedQuerySet):
+    # Триграммный индекс не находит строки короче трех символов.
+    FTS_MIN_LENGTH = 3
+
+    def _use_fts(self, value):
+        return connections[self.db].vendor == 'sqlite' and len(value) >= self.FTS_MIN_LENGTH
+
+    @staticmethod
+    def _fts_phrase(value):
+        return '"{}"'.format(value.replace('"', '""'))
+
+    def name_contains(self, value):
+        """Произведения, в названии которых есть подстрока value без учета регистра."""
+        value = normalize(value)
+        if not self._use_fts(value):
+            return self.filter(name_normalized__contains=value)
+        return self.filter(pk__in=RawSQL(
+            'SELECT rowid FROM reviews_title_fts WHERE reviews_title_fts MATCH %s',
+            (self._fts_phrase(value),)
+        ))
+
+    def search(self, value):
+        """Как name_contains, но упорядочивает по релевантности (search_rank)."""
+        value = normalize(value)
+        if not self._use_fts(value):
+            return self.name_contains(value).order_by('name')
+        return self.extra(
+            select={'search_rank': 'reviews_title_fts.rank'},
+            tables=['reviews_title_fts'],
+            where=['reviews_title_fts.rowid = reviews_title.id', 'reviews_title_fts MATCH %s'],
+            params=[self._fts_phrase(value)],
+        ).order_by('search_rank', 'name')
+
+
+# На SQLite поиск по названию идет через индекс reviews_title_fts с триггерами
+# на reviews_title (см. reviews/fts.py). Миграция, которая добавляет или
+# удаляет столбцы Title, пересоздает таблицу и теряет триггеры, поэтому
+# должна вызывать fts.rebuild_fts после изменения столбцов в обе стороны.
+class Title(NormalizedModelMixin, models.Model):
     """Содержит произведения."""
     name = models.TextField(verbose_name='произведение')
+    name_normalized = NormalizedTextField(verbose_name='произведение для поиска', source='name')
     year = models.PositiveSmallIntegerField(
         validators=[
             MinValueValidator(0, 'Год произведения не может быть отрицательным!'),
@@ -87,19 +196,51 @@ class Title(models.Model):
         null=True,
         verbose_name='категория'
     )
+    rating_sum = models.PositiveIntegerField(verbose_name='сумма оценок', default=0, editable=False)
+    rating_count = models.PositiveIntegerField(verbose_name='количество оценок', default=0, editable=False)
+    # Гистограмма оценок: по счетчику на каждое значение из SCORES.
+    score_1_count = models.PositiveIntegerField(verbose_name='оценок 1', default=0, editable=False)
+    score_2_count = models.PositiveIntegerField(verbose_name='оценок 2', default=0, editable=False)
+    score_3_count = models.PositiveIntegerField(verbose_name='оценок 3', default=0, editable=False)
+    score_4_count = models.PositiveIntegerField(verbose_name='оценок 4', default=0, editable=False)
+    score_5_count = models.PositiveIntegerField(verbose_name='оценок 5', default=0, editable=False)
+    score_6_count = models.PositiveIntegerField(verbose_name='оценок 6', default=0, editable=False)
+    score_7_count = models.PositiveIntegerField(verbose_name='оценок 7', default=0, editable=False)
+    score_8_count = models.PositiveIntegerField(verbose_name='оценок 8', default=0, editable=False)
+    score_9_count = models.PositiveIntegerField(verbose_name='оценок 9', default=0, editable=False)
+    score_10_count = models.PositiveIntegerField(verbose_name='оценок 10', default=0, editable=False)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ['name']
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['name'], name='title_name_idx'),
+            models.Index(fields=['category', 'name'], name='title_category_name_idx'),
+            models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        """Средняя оценка, округленная вниз, как у Avg('reviews__score')."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum // self.rating_count
+
+    @property
+    def histogram(self):
+        """Число оценок каждого значения: {оценка: количество}."""
+        return {score: getattr(self, score_field(score)) for score in SCORES}
+
 
 class Review(models.Model):
     """Содержит обзоры на произведения."""
-    text = models.TextField(verbose_name='текст отзыва')
+    text = CompressedTextField(verbose_name='текст отзыва')
     title = models.ForeignKey(
         Title,
         related_name='reviews',
@@ -120,20 +261,63 @@ class Review(models.Model):
         verbose_name='оценка произведения'
     )
     pub_date = models.DateTimeField(verbose_name='дата публикации отзыва', auto_now_add=True)
+    comments_count = models.PositiveIntegerField(verbose_name='количество комментариев', default=0, editable=False)
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         constraints = [models.UniqueConstraint(fields=['title', 'author'], name='unique')]
+        indexes = [
+            models.Index(fields=['title', '-pub_date'], name='review_title_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date'], name='review_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_rating_state()
+        return instance
+
+    def _remember_rating_state(self):
+        """Запоминает оценку, уже учтенную в рейтинге произведения."""
+        self._saved_title_id = self.__dict__.get('title_id')
+        self._saved_score = self.__dict__.get('score')
+
+    def save(self, *args, **kwargs):
+        # Счетчики рейтинга обновляются в post_save, в той же транзакции.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self._remember_rating_state()
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def latest_for_reviews(self, review_ids, limit):
+        """Не больше limit последних комментариев к каждому из отзывов одним запросом.
+
+        Учитываются и архивные комментарии. ROW_NUMBER() нумерует комментарии
+        внутри отзыва от новых к старым; отфильтровать по нему можно только
+        во внешнем запросе.
+        """
+        attnames = [field.attname for field in self.model._meta.concrete_fields]
+        hot = self.filter(review_id__in=review_ids).order_by().values_list(*attnames)
+        cold = ArchivedComment.objects.filter(review_id__in=review_ids).order_by().values_list(*attnames)
+        sql, params = hot.union(cold, all=True).query.sql_with_params()
+        return self.model.objects.raw(
+            'SELECT * FROM (SELECT comments.*, ROW_NUMBER() OVER '
+            '(PARTITION BY review_id ORDER BY pub_date DESC) AS row_number '
+            f'FROM ({sql}) comments) numbered WHERE row_number <= %s ORDER BY review_id, row_number',
+            (*params, limit),
+        )
+
 
 class Comment(models.Model):
     """Содержит комментарии к отзывам."""
-    text = models.TextField(verbose_name='текст комментария')
+    text = CompressedTextField(verbose_name='текст комментария')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -148,10 +332,154 @@ class Comment(models.Model):
         verbose_name='отзыв'
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['review', '-pub_date'], name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+    def save(self, *args, **kwargs):
+        # Счетчик комментариев отзыва обновляется в post_save, в той же транзакции.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class ArchivedReview(models.Model):
+    """Отзыв, перенесенный из reviews_review командой archive_old_rows.
+
+    Первичный ключ и счетчики сохраняются: архивный отзыв по-прежнему учтен
+    в рейтинге произведения. Имена столбцов совпадают с Review, чтобы обе
+    таблицы можно было читать одним UNION.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = CompressedTextField(verbose_name='текст отзыва')
+    title = models.ForeignKey(
+        Title,
+        related_name='archived_reviews',
+        on_delete=models.CASCADE,
+        verbose_name='произведение'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_reviews',
+        verbose_name='автор отзыва'
+    )
+    score = models.PositiveSmallIntegerField(verbose_name='оценка произведения')
+    pub_date = models.DateTimeField(verbose_name='дата публикации отзыва')
+    comments_count = models.PositiveIntegerField(verbose_name='количество комментариев', default=0)
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Архивный отзыв'
+        verbose_name_plural = 'Архивные отзывы'
+        indexes = [
+            models.Index(fields=['title', '-pub_date'], name='archived_review_title_idx'),
+            models.Index(fields=['author', 'title'], name='archived_review_author_idx'),
+        ]
+
+    def __str__(self):
+        return self.text
+
+
+class ArchivedComment(models.Model):
+    """Комментарий, перенесенный из reviews_comment командой archive_old_rows.
+
+    review_id — без внешнего ключа: отзыв может лежать и в reviews_review,
+    и в архиве. Удаление вслед за отзывом выполняют сигналы.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = CompressedTextField(verbose_name='текст комментария')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='автор комментария'
+    )
+    pub_date = models.DateTimeField(verbose_name='дата публикации комментария')
+    review_id = models.IntegerField(verbose_name='отзыв')
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        indexes = [
+            models.Index(fields=['review_id', '-pub_date'], name='archived_comment_review_idx'),
+        ]
+
+    def __str__(self):
+        return self.text
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку; очередь разбирает команда send_outbox."""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'ожидает отправки'),
+        (SENDING, 'отправляется'),
+        (SENT, 'отправлено'),
+        (FAILED, 'не отправлено'),
+    ]
+
+    subject = models.TextField(verbose_name='тема')
+    body = models.TextField(verbose_name='текст')
+    from_email = models.TextField(verbose_name='отправитель', blank=True, null=True)
+    to = models.JSONField(verbose_name='получатели')
+    status = models.CharField(verbose_name='статус', max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(verbose_name='попыток отправки', default=0)
+    next_attempt_at = models.DateTimeField(verbose_name='следующая попытка', default=timezone.now)
+    claim_token = models.CharField(verbose_name='метка обработчика', max_length=32, blank=True, default='')
+    claimed_at = models.DateTimeField(verbose_name='взято в работу', blank=True, null=True)
+    last_error = models.TextField(verbose_name='последняя ошибка', blank=True, default='')
+    created_at = models.DateTimeField(verbose_name='поставлено в очередь', auto_now_add=True)
+    sent_at = models.DateTimeField(verbose_name='отправлено', blank=True, null=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+            models.Index(fields=['claim_token'], name='outbox_claim_token_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {", ".join(self.to)}'
+
+
+class CoalescedEmail(models.Model):
+    """Отметка повторных писем по ключу и их счетчики (reviews.outbox.enqueue_coalesced).
+
+    Пока не прошло expires_at, новое письмо по ключу не ставится. Отметка
+    захватывается и счетчики обновляются одним INSERT ... ON CONFLICT.
+    """
+    key = models.CharField(verbose_name='ключ', max_length=100, primary_key=True)
+    email = models.ForeignKey(
+        OutboxEmail,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='письмо'
+    )
+    claim = models.CharField(verbose_name='метка захвата', max_length=32)
+    expires_at = models.DateTimeField(verbose_name='окно до')
+    sent = models.PositiveIntegerField(verbose_name='поставлено писем', default=0)
+    suppressed = models.PositiveIntegerField(verbose_name='подавлено писем', default=0)
+
+    class Meta:
+        verbose_name = 'Отметка повторных писем'
+        verbose_name_plural = 'Отметки повторных писем'
+
+    def __str__(self):
+        return self.key
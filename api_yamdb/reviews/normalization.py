@@ -0,0 +1,94 @@
+import unicodedata
+
+from django.db import models
+from django.db.models import Lookup
+
+# Символ больше любого другого: строки, начинающиеся с value, лежат
+# в полуинтервале [value, value + PREFIX_UPPER_BOUND).
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+
+def normalize(value):
+    """Приводит строку к виду для поиска без учета регистра.
+
+    SQLite сравнивает без учета регистра только ASCII, поэтому регистр
+    кириллицы сворачивается здесь, а не в базе. Ё приравнивается к Е.
+    """
+    if value is None:
+        return ''
+    return unicodedata.normalize('NFKC', value).casefold().replace('ё', 'е')
+
+
+class NormalizedTextField(models.TextField):
+    """Индексируемая теневая копия поля source в нормализованном виде.
+
+    Значение вычисляется при каждом сохранении и при bulk_create; для
+    bulk_update, update() и save(update_fields=...) его добавляют
+    NormalizedQuerySet и NormalizedModelMixin.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('db_index', True)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+@NormalizedTextField.register_lookup
+class Prefix(Lookup):
+    """Поиск по началу строки диапазоном, который может использовать индекс."""
+    lookup_name = 'prefix'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        return f'{lhs} >= %s AND {lhs} < %s', [
+            *lhs_params, self.rhs, *lhs_params, self.rhs + PREFIX_UPPER_BOUND
+        ]
+
+
+def normalized_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, NormalizedTextField)]
+
+
+def _with_normalized(model, field_names):
+    names = set(field_names)
+    return names | {field.name for field in normalized_fields(model) if field.source in names}
+
+
+class NormalizedQuerySet(models.QuerySet):
+    """Поддерживает теневые поля в bulk_update() и update()."""
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        fields = _with_normalized(self.model, fields)
+        for obj in objs:
+            for field in normalized_fields(self.model):
+                if field.name in fields:
+                    field.pre_save(obj, False)
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+    def update(self, **kwargs):
+        for field in normalized_fields(self.model):
+            value = kwargs.get(field.source)
+            if isinstance(value, str):
+                kwargs[field.name] = normalize(value)
+        return super().update(**kwargs)
+
+
+class NormalizedModelMixin:
+    """Сохраняет теневые поля вместе с исходными при save(update_fields=...)."""
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = _with_normalized(type(self), kwargs['update_fields'])
+        super().save(*args, **kwargs)
@@ -0,0 +1,197 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Q, Sum
+from django.utils import timezone
+
+from reviews.models import CoalescedEmail, OutboxEmail
+
+
+def enqueue(subject, body, from_email, recipients):
+    """Ставит письмо в очередь в текущей транзакции.
+
+    С EMAIL_OUTBOX_EAGER письмо отправляется сразу после фиксации транзакции,
+    без обработчика очереди (для разработки и тестов).
+    """
+    email = OutboxEmail.objects.create(subject=subject, body=body, from_email=from_email, to=list(recipients))
+    if settings.EMAIL_OUTBOX_EAGER:
+        transaction.on_commit(lambda: send_batch([email]))
+    return email
+
+
+_CLAIM_SQL = """
+    INSERT INTO {table} (key, claim, expires_at, sent, suppressed, email_id)
+    VALUES (%s, %s, %s, 1, 0, NULL)
+    ON CONFLICT (key) DO UPDATE SET
+        sent = sent + CASE WHEN expires_at > %s THEN 0 ELSE 1 END,
+        suppressed = suppressed + CASE WHEN expires_at > %s THEN 1 ELSE 0 END,
+        email_id = CASE WHEN expires_at > %s THEN email_id END,
+        claim = CASE WHEN expires_at > %s THEN claim ELSE excluded.claim END,
+        expires_at = CASE WHEN expires_at > %s THEN expires_at ELSE excluded.expires_at END
+    RETURNING claim, email_id
+"""
+
+
+def _claim(key, window):
+    """Захватывает отметку key на window секунд одним запросом.
+
+    В UPDATE все выражения видят старую строку: истекшая отметка
+    захватывается заново, действующая только увеличивает suppressed.
+    Запрос не открывает транзакцию: вне atomic() отметка сразу видна
+    другим процессам.
+    Возвращает (захвачена ли отметка, метка захвата, id письма отметки).
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    adapt = connection.ops.adapt_datetimefield_value
+    now_value = adapt(now)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _CLAIM_SQL.format(table=connection.ops.quote_name(CoalescedEmail._meta.db_table)),
+            [key, token, adapt(now + timedelta(seconds=window)), *[now_value] * 5],
+        )
+        claim, email_id = cursor.fetchone()
+    return claim == token, claim, email_id
+
+
+def enqueue_coalesced(key, subject, body, from_email, recipients):
+    """Как enqueue(), но не чаще одного письма на key за EMAIL_COALESCE_WINDOW секунд.
+
+    Повторный вызов в пределах окна ничего не ставит в очередь и возвращает
+    id уже поставленного письма (или None, если оно еще сохраняется).
+    Отметка и счетчики хранятся в CoalescedEmail. Возвращает пару
+    (id письма, поставлено ли новое).
+    """
+    claimed, claim, email_id = _claim(key, settings.EMAIL_COALESCE_WINDOW)
+    if not claimed:
+        return email_id, False
+    marker = CoalescedEmail.objects.filter(key=key, claim=claim)
+    try:
+        with transaction.atomic():
+            email = enqueue(subject, body, from_email, recipients)
+            marker.update(email=email)
+    except Exception:
+        # Письмо не поставлено: освобождаем отметку, чтобы следующий запрос его отправил.
+        marker.update(expires_at=timezone.now(), sent=F('sent') - 1)
+        raise
+    return email.pk, True
+
+
+def coalesce_stats():
+    """Счетчики поставленных в очередь и подавленных повторных писем."""
+    totals = CoalescedEmail.objects.aggregate(sent=Sum('sent'), suppressed=Sum('suppressed'))
+    return {counter: value or 0 for counter, value in totals.items()}
+
+
+def retry_delay(attempts):
+    """Экспоненциальная пауза перед следующей попыткой, не больше EMAIL_OUTBOX_MAX_RETRY_DELAY."""
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def _due(now):
+    # Письма, зависшие в SENDING дольше EMAIL_OUTBOX_CLAIM_TIMEOUT (обработчик
+    # упал), снова считаются готовыми к отправке.
+    stale = now - timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+    return OutboxEmail.objects.filter(
+        Q(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+        | Q(status=OutboxEmail.SENDING, claimed_at__lt=stale)
+    )
+
+
+def claim_batch(size):
+    """Забирает до size готовых писем одним UPDATE, чтобы их не взял другой обработчик."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(_due(now).order_by('next_attempt_at').values_list('pk', flat=True)[:size])
+        if not ids:
+            return []
+        _due(now).filter(pk__in=ids).update(status=OutboxEmail.SENDING, claim_token=token, claimed_at=now)
+    return list(OutboxEmail.objects.filter(claim_token=token, status=OutboxEmail.SENDING))
+
+
+def deliver(emails):
+    """Отправляет письма через одно соединение get_connection(), не обращаясь к базе.
+
+    Возвращает пары (письмо, ошибка или None) в исходном порядке.
+    """
+    results = []
+    try:
+        with get_connection() as mail_connection:
+            for email in emails:
+                message = EmailMessage(email.subject, email.body, email.from_email, email.to)
+                try:
+                    mail_connection.send_messages([message])
+                except Exception as error:
+                    results.append((email, error))
+                else:
+                    results.append((email, None))
+    except Exception as error:
+        # Соединение не открылось или оборвалось: оставшиеся письма повторятся позже.
+        results.extend((email, error) for email in emails[len(results):])
+    return results
+
+
+def record(results):
+    """Сохраняет итоги deliver(); возвращает число отправленных писем."""
+    for email, error in results:
+        if error is None:
+            _sent(email)
+        else:
+            _failed(email, error)
+    return sum(error is None for _, error in results)
+
+
+def send_batch(emails):
+    return record(deliver(emails))
+
+
+def _sent(email):
+    email.status = OutboxEmail.SENT
+    email.sent_at = timezone.now()
+    email.attempts += 1
+    email.save(update_fields=['status', 'sent_at', 'attempts'])
+
+
+def _failed(email, error):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+    else:
+        email.status = OutboxEmail.PENDING
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+
+
+def drain(workers, batch_size):
+    """Разбирает все готовые письма; возвращает число отправленных.
+
+    Пачки забирает и отмечает текущий поток, а пул из workers потоков только
+    отправляет их по SMTP: так запись в базу не конкурирует сама с собой.
+    """
+    sent = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batches = [batch for batch in (claim_batch(batch_size) for _ in range(workers)) if batch]
+            if not batches:
+                return sent
+            for results in pool.map(deliver, batches):
+                sent += record(results)
+
+
+def queue_depth():
+    """Размер очереди по статусам, число готовых к отправке и возраст самого старого из них."""
+    now = timezone.now()
+    depth = dict.fromkeys(dict(OutboxEmail.STATUSES), 0)
+    for row in OutboxEmail.objects.order_by().values('status').annotate(count=Count('id')):
+        depth[row['status']] = row['count']
+    due = _due(now).aggregate(count=Count('id'), oldest=Min('created_at'))
+    depth['due'] = due['count']
+    depth['oldest_due_seconds'] = (now - due['oldest']).total_seconds() if due['oldest'] else 0
+    return depth
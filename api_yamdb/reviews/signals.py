@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from reviews import aggregates
+from reviews.models import ArchivedComment, ArchivedReview, Comment, Review
+
+# Отправляется после массовых изменений в обход сигналов моделей
+# (bulk_create, импорт), чтобы кэши могли сбросить себя целиком.
+# Получатель может вернуть предупреждение, которое команда выведет оператору.
+bulk_changed = Signal()
+
+
+def notify_bulk_changed(sender):
+    """Отправляет bulk_changed и возвращает предупреждения получателей."""
+    return [warning for _, warning in bulk_changed.send(sender=sender) if warning]
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    """Учитывает новую или измененную оценку в рейтинге и гистограмме произведения."""
+    if created:
+        aggregates.add_score(instance.title_id, instance.score)
+        return
+    old_title_id = getattr(instance, '_saved_title_id', None)
+    old_score = getattr(instance, '_saved_score', None)
+    if old_title_id is None or old_score is None:
+        aggregates.recompute_title_rating(instance.title_id)
+        return
+    if old_title_id == instance.title_id:
+        if old_score != instance.score:
+            aggregates.change_score(instance.title_id, old_score, instance.score)
+        return
+    aggregates.remove_score(old_title_id, old_score)
+    aggregates.add_score(instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Исключает оценку удаленного отзыва, в том числе при каскадном удалении."""
+    aggregates.remove_score(instance.title_id, instance.score)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        aggregates.add_comment(instance.review_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Срабатывает и при каскадном удалении отзыва, произведения или автора."""
+    aggregates.remove_comment(instance.review_id)
+
+
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=ArchivedReview)
+def delete_archived_comments(sender, instance, **kwargs):
+    """У архивных комментариев нет внешнего ключа на отзыв, каскад выполняется здесь."""
+    ArchivedComment.objects.filter(review_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=ArchivedReview)
+def archived_review_deleted(sender, instance, **kwargs):
+    aggregates.remove_score(instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=ArchivedComment)
+def archived_comment_deleted(sender, instance, **kwargs):
+    aggregates.remove_archived_comment(instance.review_id)
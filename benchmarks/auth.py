@@ -0,0 +1,75 @@
+"""Накладные расходы аутентификации по JWT на один запрос.
+
+    python -m benchmarks.auth --repeat 20000 --output auth.json
+
+Сравнивает JWTAuthentication из simplejwt (пользователь из базы на каждый
+запрос) и StatelessJWTAuthentication без кэша токенов и с ним. Для каждого
+варианта выводит JSON: среднее и p95 в микросекундах, число SQL-запросов
+и счетчики кэша токенов.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.common import setup_django
+from benchmarks.endpoints import QueryTimer, git_revision
+
+
+def measure(authentication, request, repeat):
+    from django.db import connection
+
+    timings = []
+    timer = QueryTimer()
+    with connection.execute_wrapper(timer):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            authentication.authenticate(request)
+            timings.append((time.perf_counter() - started) * 10 ** 6)
+    return {
+        'mean_us': round(statistics.mean(timings), 2),
+        'p95_us': round(statistics.quantiles(timings, n=100)[94], 2),
+        'queries_per_request': round(timer.count / repeat, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10000, help='Вызовов authenticate() на вариант.')
+    parser.add_argument('--output', help='Файл для JSON, по умолчанию stdout.')
+    options = parser.parse_args()
+    setup_django()
+
+    from django.conf import settings
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from api.authentication import ClaimsAccessToken, StatelessJWTAuthentication, token_cache
+    from reviews.models import User
+
+    admin = User.objects.create_user(username='bench-admin', email='bench-admin@yamdb.fake', role=User.ADMIN)
+    token = ClaimsAccessToken.for_user(admin)
+    request = Request(APIRequestFactory().get('/api/v1/users/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+
+    cache_size = settings.AUTH_TOKEN_CACHE_SIZE or 10000
+    variants = {}
+    variants['jwt'] = measure(JWTAuthentication(), request, options.repeat)
+    settings.AUTH_TOKEN_CACHE_SIZE = 0
+    variants['stateless'] = measure(StatelessJWTAuthentication(), request, options.repeat)
+    settings.AUTH_TOKEN_CACHE_SIZE = cache_size
+    token_cache.clear()
+    variants['stateless_token_cache'] = measure(StatelessJWTAuthentication(), request, options.repeat)
+    variants['stateless_token_cache']['token_cache'] = token_cache.stats()
+
+    result = {'revision': git_revision(), 'repeat': options.repeat, 'variants': variants}
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT_DIR, 'api_yamdb')
+
+
+def setup_django():
+    """Настраивает Django и создает чистую тестовую базу с миграциями."""
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def add_seed_arguments(parser):
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--categories', type=int, default=10)
+    parser.add_argument('--genres', type=int, default=30)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--reviews-per-title', type=int, default=10)
+    parser.add_argument('--comments-per-review', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=5000)
+
+
+def seed(users, categories, genres, titles, reviews_per_title, comments_per_review, batch_size=5000):
+    """Заполняет базу данными заданного объема и возвращает время заполнения."""
+    from django.core.management import call_command
+    from reviews.models import Category, Comment, Genre, Review, Title, User
+
+    started = time.perf_counter()
+    rng = random.Random(0)
+    User.objects.bulk_create(
+        (User(username=f'user{number}', email=f'user{number}@yamdb.fake') for number in range(users)),
+        batch_size=batch_size,
+    )
+    Category.objects.bulk_create(
+        Category(name=f'Категория {number}', slug=f'category-{number}') for number in range(categories)
+    )
+    Genre.objects.bulk_create(Genre(name=f'Жанр {number}', slug=f'genre-{number}') for number in range(genres))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    genre_ids = list(Genre.objects.values_list('pk', flat=True))
+
+    Title.objects.bulk_create(
+        (Title(name=f'Произведение {number:07}', year=rng.randint(1900, 2022),
+               category_id=rng.choice(category_ids)) for number in range(titles)),
+        batch_size=batch_size,
+    )
+    title_ids = list(Title.objects.values_list('pk', flat=True))
+    Title.genre.through.objects.bulk_create(
+        (Title.genre.through(title_id=title_id, genre_id=genre_id)
+         for title_id in title_ids for genre_id in rng.sample(genre_ids, min(2, len(genre_ids)))),
+        batch_size=batch_size,
+    )
+
+    per_title = min(reviews_per_title, len(user_ids))
+    Review.objects.bulk_create(
+        (Review(title_id=title_id, author_id=author_id, text=f'Отзыв {author_id} на {title_id}',
+                score=rng.randint(1, 10))
+         for title_id in title_ids for author_id in rng.sample(user_ids, per_title)),
+        batch_size=batch_size,
+    )
+    review_ids = Review.objects.values_list('pk', flat=True).iterator()
+    Comment.objects.bulk_create(
+        (Comment(review_id=review_id, author_id=rng.choice(user_ids), text=f'Комментарий к {review_id}')
+         for review_id in review_ids for _ in range(comments_per_review)),
+        batch_size=batch_size,
+    )
+    # bulk_create не вызывает сигналы, денормализованные счетчики пересчитываются отдельно.
+    call_command('recompute_aggregates', stdout=open(os.devnull, 'w'))
+    return time.perf_counter() - started
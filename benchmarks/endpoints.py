@@ -0,0 +1,162 @@
+"""Задержка и SQL-запросы всех маршрутов роутера api/urls.py на заполненной базе.
+
+    python -m benchmarks.endpoints --titles 5000 --repeat 50 --output bench.json
+
+Результат — JSON: для каждого маршрута p50/p95 задержки, число SQL-запросов
+и суммарное время SQL на один запрос.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import ROOT_DIR, add_seed_arguments, seed, setup_django
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_kwargs():
+    """Значения параметров маршрутов: самые «тяжелые» объекты из базы."""
+    from django.db.models import Count
+    from reviews.models import Category, Genre, Review, Title, User
+
+    title = Title.objects.order_by('-rating_count').first()
+    review = Review.objects.filter(title=title).annotate(n=Count('comments')).order_by('-n').first()
+    return {
+        'users': {'username': User.objects.order_by('pk').values_list('username', flat=True).first()},
+        'categories': {'slug': Category.objects.values_list('slug', flat=True).first()},
+        'genres': {'slug': Genre.objects.values_list('slug', flat=True).first()},
+        'titles': {'pk': title.pk},
+        'reviews': {'title_id': title.pk, 'pk': review.pk},
+        'comments': {'title_id': title.pk, 'review_id': review.pk, 'pk': review.comments.values_list(
+            'pk', flat=True).first()},
+    }
+
+
+def router_urls():
+    """Адреса всех GET-маршрутов роутера api.urls: list, detail и дополнительные действия."""
+    from django.urls import NoReverseMatch, reverse
+    from api.urls import router
+
+    samples = sample_kwargs()
+    urls = {}
+    for prefix, viewset, basename in router.registry:
+        kwargs = dict(samples[basename])
+        lookup = getattr(viewset, 'lookup_field', 'pk')
+        lookup_value = kwargs.pop(lookup, None)
+        routes = [('list', False)]
+        if hasattr(viewset, 'retrieve'):
+            routes.append(('detail', True))
+        routes += [(action.url_name, action.detail) for action in viewset.get_extra_actions()
+                   if 'get' in action.mapping]
+        for url_name, detail in routes:
+            if detail and lookup_value is None:
+                continue
+            try:
+                urls[f'{basename}-{url_name}'] = reverse(
+                    f'api:{basename}-{url_name}', kwargs={**kwargs, lookup: lookup_value} if detail else kwargs
+                )
+            except NoReverseMatch:
+                pass
+    return urls
+
+
+def admin_client():
+    from rest_framework.test import APIClient
+    from api.authentication import ClaimsAccessToken
+    from reviews.models import User
+
+    # Токен как при входе: права из утверждений, без запроса пользователя.
+    admin = User.objects.create_user(username='bench-admin', email='bench-admin@yamdb.fake', role=User.ADMIN)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsAccessToken.for_user(admin)}')
+    return client
+
+
+class QueryTimer:
+    """execute_wrapper, считающий SQL-запросы и их время с точностью perf_counter."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def measure(client, url, repeat, cold):
+    from django.core.cache import caches
+    from django.db import connection
+
+    latencies, query_counts, sql_times = [], [], []
+    status_code = None
+    for _ in range(repeat):
+        if cold:
+            for cache in caches.all():
+                cache.clear()
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            response = client.get(url)
+            # Потоковый ответ выполняет запросы и сериализацию, пока его читают.
+            if response.streaming:
+                b''.join(response.streaming_content)
+            latencies.append((time.perf_counter() - started) * 1000)
+        status_code = response.status_code
+        query_counts.append(timer.count)
+        sql_times.append(timer.seconds * 1000)
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'url': url,
+        'status': status_code,
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(percentiles[94], 3),
+        'queries': max(query_counts),
+        'sql_ms': round(statistics.median(sql_times), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_seed_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=30, help='Запросов на каждый маршрут.')
+    parser.add_argument('--cold', action='store_true', help='Очищать кэши перед каждым запросом.')
+    parser.add_argument('--output', help='Файл для JSON, по умолчанию stdout.')
+    options = vars(parser.parse_args())
+    repeat, cold, output = options.pop('repeat'), options.pop('cold'), options.pop('output')
+    setup_django()
+
+    seed_seconds = seed(**options)
+    client = admin_client()
+    result = {
+        'revision': git_revision(),
+        'volumes': options,
+        'seed_seconds': round(seed_seconds, 2),
+        'repeat': repeat,
+        'cold': cold,
+        'endpoints': {name: measure(client, url, repeat, cold) for name, url in router_urls().items()},
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Планы запросов для основных путей доступа с новыми индексами и без них.
+
+    python -m benchmarks.query_plans --titles 20000
+"""
+import argparse
+
+from benchmarks.common import add_seed_arguments, seed, setup_django
+
+
+def access_paths():
+    from reviews.models import Comment, Review, Title
+
+    review = Review.objects.order_by('pk').first()
+    title = review.title
+    genre = title.genre.first()
+    return {
+        'reviews by title': Review.objects.filter(title=title).order_by('-pub_date')[:10],
+        'comments by review': Comment.objects.filter(review=review).order_by('-pub_date')[:10],
+        'reviews by author': Review.objects.filter(author=review.author_id).order_by('-pub_date')[:10],
+        'titles by category': Title.objects.filter(category=title.category_id).order_by('name')[:10],
+        'titles by genre': Title.objects.filter(genre=genre).order_by('name')[:10],
+        'titles by year': Title.objects.filter(year=title.year).order_by('name')[:10],
+        'titles by name': Title.objects.order_by('name')[:10],
+    }
+
+
+def new_indexes():
+    from reviews.models import Comment, Review, Title
+    return [index.name for model in (Title, Review, Comment) for index in model._meta.indexes]
+
+
+def explain(queryset, label):
+    from django.db import connection
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        # Метка делает текст запроса уникальным: sqlite3 кэширует
+        # подготовленные запросы вместе с планом.
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql} /* {label} */', params)
+        return '\n'.join(row[-1] for row in cursor.fetchall())
+
+
+def explain_all(label):
+    return {name: explain(queryset, label) for name, queryset in access_paths().items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_seed_arguments(parser)
+    options = vars(parser.parse_args())
+    setup_django()
+
+    from django.db import connection, transaction
+    seconds = seed(**options)
+    print(f'seeded in {seconds:.1f}s')
+
+    after = explain_all('after')
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for name in new_indexes():
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+        before = explain_all('before')
+        transaction.set_rollback(True)
+
+    for name in after:
+        print(f'\n== {name}')
+        print('-- before:')
+        print(before[name])
+        print('-- after:')
+        print(after[name])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Пропускная способность регистрации (/api/v1/auth/signup/) на большой таблице пользователей.
+
+    python -m benchmarks.signup --users 200000 --repeat 500 --output signup.json
+
+Для новых пользователей, повторной регистрации существующих и конфликтов по
+username или email выводит JSON: p50/p95 задержки, запросов в секунду, число
+SQL-запросов и суммарное время SQL на один запрос.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.common import setup_django
+from benchmarks.endpoints import QueryTimer, git_revision
+
+URL = '/api/v1/auth/signup/'
+
+
+def seed_users(users, batch_size):
+    from reviews.models import User
+
+    started = time.perf_counter()
+    User.objects.bulk_create(
+        (User(username=f'user{number}', email=f'user{number}@yamdb.fake') for number in range(users)),
+        batch_size=batch_size,
+    )
+    return time.perf_counter() - started
+
+
+def cases(users, repeat):
+    """Тела запросов для каждого сценария; существующие пользователи берутся по всей таблице."""
+    step = max(users // repeat, 1)
+    existing = [number * step % users for number in range(repeat)]
+    return {
+        'new': [{'username': f'new{number}', 'email': f'new{number}@yamdb.fake'} for number in range(repeat)],
+        'existing': [{'username': f'user{number}', 'email': f'user{number}@yamdb.fake'} for number in existing],
+        'conflict': [{'username': f'user{number}', 'email': f'other{number}@yamdb.fake'} for number in existing],
+    }
+
+
+def measure(client, bodies):
+    from django.db import connection
+
+    latencies, query_counts, sql_times = [], [], []
+    statuses = set()
+    started = time.perf_counter()
+    for body in bodies:
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            request_started = time.perf_counter()
+            response = client.post(URL, data=body)
+            latencies.append((time.perf_counter() - request_started) * 1000)
+        statuses.add(response.status_code)
+        query_counts.append(timer.count)
+        sql_times.append(timer.seconds * 1000)
+    elapsed = time.perf_counter() - started
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'status': sorted(statuses),
+        'requests_per_second': round(len(bodies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(percentiles[94], 3),
+        'queries': max(query_counts),
+        'sql_ms': round(statistics.median(sql_times), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=300, help='Запросов на каждый сценарий.')
+    parser.add_argument('--output', help='Файл для JSON, по умолчанию stdout.')
+    options = parser.parse_args()
+    setup_django()
+
+    from django.conf import settings
+    from rest_framework.test import APIClient
+
+    # Письма только ставятся в очередь, а повторные не подавляются: измеряется сама регистрация.
+    settings.EMAIL_OUTBOX_EAGER = False
+    settings.EMAIL_COALESCE_WINDOW = 0
+    seed_seconds = seed_users(options.users, options.batch_size)
+    client = APIClient()
+    result = {
+        'revision': git_revision(),
+        'users': options.users,
+        'seed_seconds': round(seed_seconds, 2),
+        'repeat': options.repeat,
+        'cases': {name: measure(client, bodies) for name, bodies in cases(options.users, options.repeat).items()},
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
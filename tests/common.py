@@ -2,6 +2,8 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from reviews.models import Category, Genre, Title
+
 
 def create_users_api(admin_client):
     data = {
@@ -113,3 +115,36 @@ def create_comments(admin_client, admin):
     result.append({'id': create_comment(client_moderator, titles[0]["id"], reviews[0]["id"], 'qwerty321'),
                    'author': moderator.username, 'text': 'qwerty321'})
     return result, reviews, titles, user, moderator
+
+
+def create_many_titles(count):
+    category = Category.objects.create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.create(name='Ужасы', slug='horror'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+    titles = []
+    for number in range(count):
+        title = Title.objects.create(name=f'Произведение {number:03}', year=2000, category=category)
+        title.genre.set(genres)
+        titles.append(title)
+    return titles
+
+
+def selects_from(queries, table):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql']
+    ]
+
+
+def client_for(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def signup(client, index=1):
+    return client.post('/api/v1/auth/signup/', data={
+        'username': f'user{index}', 'email': f'user{index}@yamdb.fake'
+    })
@@ -0,0 +1,13 @@
+import pytest
+from django.core.cache import caches
+
+from api.authentication import token_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Тестовая база очищается между тестами, а кэш в памяти процесса — нет.
+    for cache in caches.all():
+        cache.clear()
+    token_cache.clear()
+    yield
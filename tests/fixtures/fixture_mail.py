@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_outbox(settings):
+    # Тесты проверяют mail.outbox сразу после запроса, без обработчика очереди.
+    settings.EMAIL_OUTBOX_EAGER = True
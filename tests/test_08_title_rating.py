@@ -0,0 +1,77 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+
+from .common import auth_client, create_reviews
+
+
+class Test08TitleRating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_counters(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что при создании отзыва обновляются счетчики рейтинга произведения'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/', data={'score': 10}
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (17, 3), (
+            'Проверьте, что при изменении оценки обновляются счетчики рейтинга произведения'
+        )
+
+        auth_client(user).delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/')
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (14, 2), (
+            'Проверьте, что при удалении отзыва обновляются счетчики рейтинга произведения'
+        )
+
+        moderator.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (10, 1), (
+            'Проверьте, что при удалении пользователя учитывается каскадное удаление его отзывов'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') == 10
+        assert 'rating_sum' not in response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recompute_command(self, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.filter(pk=titles[0]['id']).update(rating_sum=1, rating_count=1)
+
+        out = StringIO()
+        call_command('recompute_aggregates', '--check', stdout=out)
+        assert f'title={titles[0]["id"]}' in out.getvalue(), (
+            'Проверьте, что команда `recompute_aggregates` сообщает о расхождениях'
+        )
+        assert Title.objects.get(pk=titles[0]['id']).rating_sum == 1
+
+        call_command('recompute_aggregates', stdout=StringIO())
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что команда `recompute_aggregates` исправляет расхождения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_recompute_invalidates_cache(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        Title.objects.filter(pk=titles[0]['id']).update(rating_sum=2, rating_count=1)
+        etag = client.get(url)['ETag']
+        assert client.get('/api/v1/titles/').json()['results'][0]['rating'] == 2
+
+        call_command('recompute_aggregates', stdout=StringIO())
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response.json()['rating'] == 4, (
+            'Проверьте, что после исправления счетчиков `recompute_aggregates` старый ETag не дает 304'
+        )
+        assert client.get('/api/v1/titles/').json()['results'][0]['rating'] == 4, (
+            'Проверьте, что после `recompute_aggregates` список произведений не отдается из старого кэша'
+        )
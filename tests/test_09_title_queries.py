@@ -0,0 +1,25 @@
+import pytest
+
+from .common import create_many_titles
+
+
+class Test09TitleQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('titles_count', [1, 5, 30])
+    def test_01_title_list_queries(self, client, django_assert_num_queries, titles_count):
+        create_many_titles(titles_count)
+        # COUNT для пагинации, выборка произведений с категориями, выборка жанров
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == min(titles_count, 10)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_queries(self, client, django_assert_num_queries):
+        titles = create_many_titles(3)
+        # выборка произведения с категорией, выборка жанров
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{titles[0].pk}/')
+        assert response.status_code == 200
+        assert len(response.json()['genre']) == 2
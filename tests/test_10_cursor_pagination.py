@@ -0,0 +1,68 @@
+import pytest
+
+from reviews.models import Review
+
+from .common import create_many_titles
+
+
+class Test10CursorPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_cursor_pages(self, client, django_assert_num_queries):
+        titles = create_many_titles(25)
+        url = '/api/v1/titles/?pagination=cursor'
+        names = []
+        while url:
+            # без COUNT(*): выборка страницы и выборка жанров
+            with django_assert_num_queries(2):
+                response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме `/api/v1/titles/` не считается общее количество'
+            )
+            names.extend(title['name'] for title in data['results'])
+            url = data['next']
+        assert names == sorted(title.name for title in titles), (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` проходит все произведения по названию'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_page_number_kept(self, client):
+        create_many_titles(25)
+        response = client.get('/api/v1/titles/?page=3')
+        data = response.json()
+        assert data['count'] == 25 and len(data['results']) == 5, (
+            'Проверьте, что постраничная пагинация `/api/v1/titles/` по-прежнему работает по умолчанию'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_cursor_pages(self, client, django_user_model):
+        title = create_many_titles(1)[0]
+        for number in range(15):
+            author = django_user_model.objects.create_user(
+                username=f'user{number}', email=f'user{number}@yamdb.fake'
+            )
+            Review.objects.create(title=title, author=author, text=f'Отзыв {number}', score=5)
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        reviews = []
+        while url:
+            data = client.get(url).json()
+            assert 'count' not in data
+            reviews.extend(data['results'])
+            url = data['next']
+        assert sorted(review['text'] for review in reviews) == sorted(f'Отзыв {number}' for number in range(15))
+        dates = [review['pub_date'] for review in reviews]
+        assert dates == sorted(dates, reverse=True), (
+            'Проверьте, что курсорная пагинация отзывов идет от новых к старым'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_cursor_with_search_rejected(self, client):
+        create_many_titles(3)
+        response = client.get('/api/v1/titles/?pagination=cursor&search=Произведение')
+        assert response.status_code == 400 and 'search' in response.json(), (
+            'Проверьте, что поиск по релевантности нельзя сочетать с курсорной пагинацией `/api/v1/titles/`'
+        )
+        response = client.get('/api/v1/titles/?search=Произведение')
+        assert response.status_code == 200 and response.json()['count'] == 3
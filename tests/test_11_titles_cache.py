@@ -0,0 +1,99 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from api import cache
+from reviews.models import Review, Title
+
+from .common import create_many_titles
+
+
+class Test11TitlesCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cache_hit(self, client, django_assert_num_queries):
+        create_many_titles(3)
+        first = client.get('/api/v1/titles/?year=2000&page=1')
+        with django_assert_num_queries(0):
+            second = client.get('/api/v1/titles/?page=1&year=2000')
+        assert second.json() == first.json(), (
+            'Проверьте, что повторный GET запрос `/api/v1/titles/` отдается из кэша '
+            'независимо от порядка параметров'
+        )
+        assert cache.get_stats(cache.TITLES) == {'hits': 1, 'misses': 1}
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('backend', ['locmem', 'filebased'])
+    def test_02_invalidation(self, client, django_user_model, settings, tmp_path, backend):
+        if backend == 'filebased':
+            settings.CACHES = {
+                **settings.CACHES,
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': str(tmp_path),
+                },
+            }
+        title = create_many_titles(1)[0]
+        assert client.get('/api/v1/titles/').json()['count'] == 1
+
+        Title.objects.create(name='Новое', year=2001)
+        assert client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что создание произведения сбрасывает кэш `/api/v1/titles/`'
+        )
+
+        author = django_user_model.objects.create_user(username='critic', email='critic@yamdb.fake')
+        Review.objects.create(title=title, author=author, text='Отлично', score=9)
+        results = client.get('/api/v1/titles/').json()['results']
+        assert [item['rating'] for item in results if item['id'] == title.pk] == [9], (
+            'Проверьте, что новый отзыв сбрасывает кэш `/api/v1/titles/`'
+        )
+
+        title.category.name = 'Кино'
+        title.category.save()
+        results = client.get('/api/v1/titles/').json()['results']
+        assert [item['category']['name'] for item in results if item['id'] == title.pk] == ['Кино'], (
+            'Проверьте, что изменение категории сбрасывает кэш `/api/v1/titles/`'
+        )
+
+        title.genre.clear()
+        results = client.get('/api/v1/titles/').json()['results']
+        assert [item['genre'] for item in results if item['id'] == title.pk] == [[]], (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш `/api/v1/titles/`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bump_after_commit(self, admin):
+        title = create_many_titles(1)[0]
+        before = cache.get_versions([cache.TITLES, cache.reviews_namespace(title.pk)])
+        with transaction.atomic():
+            Review.objects.create(title=title, author=admin, text='Отлично', score=9)
+            assert cache.get_versions(before) == before, (
+                'Проверьте, что версии кэша сдвигаются только после фиксации транзакции'
+            )
+        after = cache.get_versions(before)
+        assert all(after[namespace] > before[namespace] for namespace in before)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_stats_from_server(self, client, admin_client, user_client):
+        create_many_titles(1)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        assert user_client.get('/api/v1/cache/stats/').status_code == 403
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 200
+        stats = response.json()[cache.TITLES]
+        assert (stats['hits'], stats['misses']) == (1, 1), (
+            'Проверьте, что `/api/v1/cache/stats/` отдает счетчики кэша процесса сервера'
+        )
+        assert set(response.json()['tokens']) == {'hits', 'misses', 'size'}, (
+            'Проверьте, что `/api/v1/cache/stats/` отдает счетчики кэша токенов'
+        )
+        assert set(response.json()['usernames']) == {'hits', 'misses', 'size'}
+
+        err = StringIO()
+        call_command('api_cache_stats', stdout=StringIO(), stderr=err)
+        assert 'памяти процесса' in err.getvalue(), (
+            'Проверьте, что api_cache_stats предупреждает о кэше в памяти процесса'
+        )
@@ -0,0 +1,143 @@
+import time
+from unittest import mock
+
+import pytest
+
+from reviews.models import Comment, Review
+
+from .common import create_many_titles
+
+
+def create_review(django_user_model, title, username='critic'):
+    author = django_user_model.objects.create_user(username=username, email=f'{username}@yamdb.fake')
+    return Review.objects.create(title=title, author=author, text='Отлично', score=9)
+
+
+class Test12ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_detail_etag(self, client, django_user_model, django_assert_num_queries):
+        title = create_many_titles(1)[0]
+        url = f'/api/v1/titles/{title.pk}/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag.startswith('"'), (
+            f'Проверьте, что GET запрос `{url}` возвращает строгий ETag'
+        )
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            f'Проверьте, что GET запрос `{url}` с актуальным If-None-Match возвращает 304 без запросов к базе'
+        )
+        assert response['ETag'] == etag
+
+        create_review(django_user_model, title)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что после нового отзыва ETag `{url}` меняется'
+        )
+        assert response.json()['rating'] == 9
+        assert response['ETag'] != etag
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_list_etag(self, client, django_user_model):
+        title = create_many_titles(1)[0]
+        review = create_review(django_user_model, title)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert client.get(f'{url}?page=1', HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что ETag зависит от параметров запроса'
+        )
+
+        review.text = 'Передумал'
+        review.save()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            f'Проверьте, что после изменения отзыва ETag `{url}` меняется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_last_modified(self, client, django_user_model):
+        title = create_many_titles(1)[0]
+        review = create_review(django_user_model, title)
+        comment = Comment.objects.create(review=review, author=review.author, text='Согласен')
+        for url in (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/',
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/{comment.pk}/',
+        ):
+            with mock.patch('time.time', return_value=time.time() + 1):
+                response = client.get(url)
+            last_modified = response['Last-Modified']
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            assert response.status_code == 304, (
+                f'Проверьте, что GET запрос `{url}` с актуальным If-Modified-Since возвращает 304'
+            )
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT')
+            assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_change_within_same_second(self, client, django_user_model):
+        title = create_many_titles(1)[0]
+        review = create_review(django_user_model, title)
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        with mock.patch('time.time', return_value=review.pub_date.timestamp()):
+            response = client.get(url)
+        assert response.status_code == 200 and 'ETag' in response, response
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что Last-Modified не отдается, пока не прошла секунда последнего изменения: '
+            'иначе изменение в ту же секунду даст устаревший 304 на If-Modified-Since'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_versions_outlive_timeout(self, client, settings):
+        title = create_many_titles(1)[0]
+        for url in (f'/api/v1/titles/{title.pk}/', '/api/v1/titles/'):
+            with mock.patch('time.time', return_value=time.time() + 1):
+                response = client.get(url)
+            etag, last_modified = response['ETag'], response['Last-Modified']
+            with mock.patch('time.time', return_value=time.time() + settings.API_CACHE_TIMEOUT + 1):
+                assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+                    'Проверьте, что ETag неизменного ресурса не меняется по истечении API_CACHE_TIMEOUT'
+                )
+                assert client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_only_username_changes_matter(self, client, django_user_model):
+        title = create_many_titles(1)[0]
+        review = create_review(django_user_model, title)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = client.get(url)['ETag']
+
+        client.post('/api/v1/auth/signup/', data={'username': 'newcomer', 'email': 'newcomer@yamdb.fake'})
+        author = django_user_model.objects.get(pk=review.author_id)
+        author.bio = 'Новая биография'
+        author.save()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+            'Проверьте, что регистрация и правка профиля без смены имени не меняют ETag отзывов'
+        )
+
+        author.username = 'renamed'
+        author.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response.json()['results'][0]['author'] == 'renamed', (
+            'Проверьте, что после смены имени автора ETag отзывов меняется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_deleted_parent(self, client, django_user_model):
+        first, second = create_many_titles(2)
+        review = create_review(django_user_model, first)
+        comments_url = f'/api/v1/titles/{first.pk}/reviews/{review.pk}/comments/'
+        reviews_url = f'/api/v1/titles/{second.pk}/reviews/'
+        comments_etag = client.get(comments_url)['ETag']
+        reviews_etag = client.get(reviews_url)['ETag']
+
+        review.delete()
+        assert client.get(comments_url, HTTP_IF_NONE_MATCH=comments_etag).status_code == 404, (
+            'Проверьте, что список комментариев удаленного отзыва не отвечает 304'
+        )
+        second.delete()
+        assert client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag).status_code == 404, (
+            'Проверьте, что список отзывов удаленного произведения без отзывов не отвечает 304'
+        )
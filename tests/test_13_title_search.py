@@ -0,0 +1,53 @@
+import pytest
+
+from reviews.models import Title
+
+
+class Test13TitleSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_name_filter(self, client):
+        Title.objects.create(name='Поворот туда', year=2000)
+        Title.objects.create(name='Проект', year=2020)
+        Title.objects.create(name='Разворот', year=2010)
+
+        response = client.get('/api/v1/titles/', {'name': 'ворот'})
+        names = sorted(title['name'] for title in response.json()['results'])
+        assert names == ['Поворот туда', 'Разворот'], (
+            'Проверьте, что фильтр `name` в `/api/v1/titles/` ищет по подстроке'
+        )
+        response = client.get('/api/v1/titles/', {'name': 'Пр'})
+        assert [title['name'] for title in response.json()['results']] == ['Проект'], (
+            'Проверьте, что фильтр `name` работает и для коротких строк'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_index_follows_writes(self, client):
+        title = Title.objects.create(name='Поворот туда', year=2000)
+        title.name = 'Проект'
+        title.save()
+        assert client.get('/api/v1/titles/', {'name': 'ворот'}).json()['count'] == 0
+        assert client.get('/api/v1/titles/', {'name': 'роект'}).json()['count'] == 1, (
+            'Проверьте, что поисковый индекс обновляется при изменении названия'
+        )
+        title.delete()
+        assert client.get('/api/v1/titles/', {'name': 'роект'}).json()['count'] == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_ranked_search(self, client):
+        # Создаются от худшего совпадения к лучшему, чтобы порядок не совпал с порядком id.
+        Title.objects.create(name='Сказка о мастере на все руки, который жил в далекой деревне', year=1900)
+        Title.objects.create(name='Мастер и Маргарита, роман о мастере', year=1967)
+        Title.objects.create(name='Мастер', year=2001)
+        Title.objects.create(name='Идиот', year=1869)
+        response = client.get('/api/v1/titles/', {'search': 'мастер'})
+        assert response.status_code == 200
+        names = [title['name'] for title in response.json()['results']]
+        assert names == [
+            'Мастер',
+            'Мастер и Маргарита, роман о мастере',
+            'Сказка о мастере на все руки, который жил в далекой деревне',
+        ], (
+            'Проверьте, что параметр `search` в `/api/v1/titles/` находит произведения по названию '
+            'и ставит лучшие совпадения первыми'
+        )
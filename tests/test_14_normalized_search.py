@@ -0,0 +1,61 @@
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+class Test14NormalizedSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cyrillic_case(self, client, admin_client):
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.create(name='Ёлочные сказки', slug='tales')
+        Title.objects.create(name='ПОВОРОТ ТУДА', year=2000)
+
+        response = client.get('/api/v1/categories/', {'search': 'фильм'})
+        assert [item['slug'] for item in response.json()['results']] == ['films'], (
+            'Проверьте, что поиск категорий не зависит от регистра кириллицы'
+        )
+        response = client.get('/api/v1/genres/', {'search': 'елочные'})
+        assert [item['slug'] for item in response.json()['results']] == ['tales'], (
+            'Проверьте, что поиск жанров не различает регистр и букву ё'
+        )
+        for value in ('поворот', 'по'):
+            response = client.get('/api/v1/titles/', {'name': value})
+            assert response.json()['count'] == 1, (
+                'Проверьте, что фильтр `name` в `/api/v1/titles/` не зависит от регистра кириллицы'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_users_search(self, admin_client, django_user_model):
+        django_user_model.objects.create_user(username='Иван', email='ivan@yamdb.fake')
+        django_user_model.objects.create_user(username='Иванов', email='ivanov@yamdb.fake')
+        django_user_model.objects.create_user(username='Севан', email='sevan@yamdb.fake')
+        django_user_model.objects.create_user(username='Петр', email='petr@yamdb.fake')
+        response = admin_client.get('/api/v1/users/', {'search': 'ИВАН'})
+        assert sorted(item['username'] for item in response.json()['results']) == ['Иван', 'Иванов'], (
+            'Проверьте, что поиск пользователей не зависит от регистра кириллицы'
+        )
+        response = admin_client.get('/api/v1/users/', {'search': 'ВАН'})
+        assert sorted(item['username'] for item in response.json()['results']) == ['Иван', 'Иванов', 'Севан'], (
+            'Проверьте, что поиск пользователей, как и раньше, ищет подстроку, а не только начало имени'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_operations(self):
+        Genre.objects.bulk_create([Genre(name='Драма', slug='drama'), Genre(name='Комедия', slug='comedy')])
+        assert Genre.objects.get(slug='drama').name_normalized == 'драма', (
+            'Проверьте, что теневое поле заполняется при bulk_create'
+        )
+        Genre.objects.filter(slug='drama').update(name='ТРАГЕДИЯ')
+        assert Genre.objects.get(slug='drama').name_normalized == 'трагедия', (
+            'Проверьте, что теневое поле обновляется при update()'
+        )
+        genre = Genre.objects.get(slug='comedy')
+        genre.name = 'Фарс'
+        Genre.objects.bulk_update([genre], ['name'])
+        assert Genre.objects.get(slug='comedy').name_normalized == 'фарс', (
+            'Проверьте, что теневое поле обновляется при bulk_update()'
+        )
+        genre.name = 'Буффонада'
+        genre.save(update_fields=['name'])
+        assert Genre.objects.get(slug='comedy').name_normalized == 'буффонада'
@@ -0,0 +1,59 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, Review, Title, User
+from reviews.signals import notify_bulk_changed
+
+
+class Test15ImportCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_static_data(self, client):
+        out = StringIO()
+        call_command('import_csv', '--batch-size', '10', stdout=out)
+        assert 'строк/с' in out.getvalue(), (
+            'Проверьте, что команда `import_csv` сообщает скорость загрузки'
+        )
+        assert 'общий бэкенд кэша' in out.getvalue(), (
+            'Проверьте, что `import_csv` предупреждает: кэш в памяти процесса не сбросится у сервера'
+        )
+        assert 'асхождени' not in out.getvalue(), (
+            'Проверьте, что `import_csv` вызывает recompute_aggregates с verbosity=0 и без его итогов'
+        )
+        assert User.objects.count() == 5
+        assert Title.objects.count() == 32
+        assert Review.objects.count() == 72
+        assert Comment.objects.count() == 3
+
+        review = Review.objects.get(pk=1)
+        assert (review.title_id, review.author_id, review.score) == (1, 100, 10)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что команда `import_csv` сохраняет дату публикации из файла'
+        )
+        title = Title.objects.get(pk=1)
+        assert title.genre.count() > 0
+        assert title.rating_count == Review.objects.filter(title=title).count(), (
+            'Проверьте, что после импорта пересчитаны рейтинги произведений'
+        )
+        assert not User.objects.get(pk=100).has_usable_password()
+
+        response = client.get('/api/v1/titles/', {'name': 'шоушенк'})
+        assert response.json()['count'] == 1
+        title = Title.objects.create(name='Новое', year=2020)
+        assert title.pk > 32, (
+            'Проверьте, что после импорта новые записи не конфликтуют с загруженными id'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_shared_cache_no_warning(self, settings, tmp_path):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': str(tmp_path),
+            }
+        }
+        assert notify_bulk_changed(self.__class__) == [], (
+            'Проверьте, что с общим бэкендом кэша предупреждения нет'
+        )
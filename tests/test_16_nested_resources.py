@@ -0,0 +1,48 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+
+from .common import create_many_titles, selects_from
+
+
+class Test16NestedResources:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_wrong_review_is_404(self, client, admin):
+        first, second = create_many_titles(2)
+        review = Review.objects.create(title=first, author=admin, text='Отлично', score=9)
+        url = f'/api/v1/titles/{second.pk}/reviews/{review.pk}/comments/'
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что комментарии к отзыву другого произведения возвращают 404'
+        )
+        url = f'/api/v1/titles/{first.pk}/reviews/{review.pk + 1}/comments/'
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что комментарии к несуществующему отзыву возвращают 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_single_lookup(self, client, admin_client, admin):
+        title = create_many_titles(1)[0]
+        review = Review.objects.create(title=title, author=admin, text='Отлично', score=9)
+        Comment.objects.create(review=review, author=admin, text='Согласен')
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get(url).status_code == 200
+        assert not selects_from(queries, 'reviews_title')
+        assert len(selects_from(queries, 'reviews_review')) == 1, (
+            'Проверьте, что произведение и отзыв из адреса загружаются одним запросом'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            assert admin_client.post(url, data={'text': 'Еще'}).status_code == 201
+        assert not selects_from(queries, 'reviews_title')
+        assert len(selects_from(queries, 'reviews_review')) == 1, (
+            'Проверьте, что при создании комментария отзыв загружается один раз'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get(f'/api/v1/titles/{title.pk}/reviews/').status_code == 200
+        assert len(selects_from(queries, 'reviews_title')) == 1
@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import cache
+from reviews.models import Comment, Review
+
+from .common import create_many_titles, selects_from
+
+
+def create_reviews(title, django_user_model, count):
+    authors = [
+        django_user_model.objects.create_user(username=f'author{index}', email=f'author{index}@yamdb.fake')
+        for index in range(count)
+    ]
+    return [
+        Review.objects.create(title=title, author=author, text='Текст', score=5)
+        for author in authors
+    ]
+
+
+class Test17ReviewAuthors:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('count', (1, 5))
+    def test_01_one_query_per_page(self, client, django_user_model, count):
+        title = create_many_titles(1)[0]
+        reviews = create_reviews(title, django_user_model, count)
+        for review in reviews:
+            Comment.objects.create(review=review, author=review.author, text='Комментарий')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        assert response.status_code == 200
+        assert sorted(item['author'] for item in response.json()['results']) == [
+            f'author{index}' for index in range(count)
+        ]
+        users = selects_from(queries, 'reviews_user')
+        assert len(users) == 1 and '"bio"' not in users[0], (
+            'Проверьте, что имена авторов страницы отзывов загружаются одним запросом без лишних полей'
+        )
+
+        url = f'/api/v1/titles/{title.pk}/reviews/{reviews[0].pk}/comments/'
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.json()['results'][0]['author'] == 'author0'
+        assert len(selects_from(queries, 'reviews_user')) == 1, (
+            'Проверьте, что имена авторов страницы комментариев загружаются одним запросом'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_lru_invalidation(self, client, admin_client, django_user_model, settings):
+        settings.USERNAME_CACHE_SIZE = 10
+        cache.username_cache.clear()
+        title = create_many_titles(1)[0]
+        review = create_reviews(title, django_user_model, 1)[0]
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+
+        assert client.get(url).json()['results'][0]['author'] == 'author0'
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get(url).json()['results'][0]['author'] == 'author0'
+        assert not selects_from(queries, 'reviews_user'), (
+            'Проверьте, что при USERNAME_CACHE_SIZE имена авторов берутся из LRU-кэша'
+        )
+
+        response = admin_client.patch('/api/v1/users/author0/', data={'username': 'renamed'})
+        assert response.status_code == 200
+        assert client.get(url).json()['results'][0]['author'] == 'renamed', (
+            'Проверьте, что после смены имени пользователя кэш имен сбрасывается'
+        )
+        cache.username_cache.clear()
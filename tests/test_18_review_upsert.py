@@ -0,0 +1,73 @@
+import pytest
+from django.utils import timezone
+
+from reviews.models import ArchivedReview, Review
+
+from .common import create_many_titles, selects_from
+
+
+class Test18ReviewUpsert:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_create_without_exists_check(self, admin_client, django_assert_num_queries):
+        title = create_many_titles(1)[0]
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        # пользователь по токену, BEGIN, произведение, SAVEPOINT, INSERT отзыва,
+        # UPDATE рейтинга, RELEASE, проверка архива после вставки, имя автора
+        with django_assert_num_queries(9) as queries:
+            response = admin_client.post(url, data={'text': 'Отлично', 'score': 9})
+        assert response.status_code == 201
+        assert not selects_from(queries, 'reviews_review'), (
+            'Проверьте, что создание отзыва не проверяет дубликат отдельным запросом'
+        )
+        statements = [query['sql'] for query in queries.captured_queries]
+        archive_check = statements.index(selects_from(queries, 'reviews_archivedreview')[0])
+        insert = next(index for index, sql in enumerate(statements) if sql.startswith('INSERT'))
+        assert archive_check > insert, (
+            'Проверьте, что архив проверяется после вставки отзыва, в той же транзакции'
+        )
+        response = admin_client.post(url, data={'text': 'Еще раз', 'score': 1})
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв на произведение возвращает 400, а не 500'
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (9, 1), (
+            'Проверьте, что отклоненный отзыв не меняет рейтинг'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_put_mine(self, client, admin_client, admin):
+        title = create_many_titles(1)[0]
+        url = f'/api/v1/titles/{title.pk}/reviews/mine/'
+        assert client.put(url, data={'text': 'Гость', 'score': 5}).status_code == 401
+
+        response = admin_client.put(url, data={'text': 'Хорошо', 'score': 7})
+        assert response.status_code == 201, (
+            'Проверьте, что PUT `/api/v1/titles/{title_id}/reviews/mine/` создает отзыв и возвращает 201'
+        )
+        review_id = response.json()['id']
+        for _ in range(2):
+            response = admin_client.put(url, data={'text': 'Отлично', 'score': 10})
+            assert response.status_code == 200, (
+                'Проверьте, что повторный PUT обновляет отзыв и возвращает 200'
+            )
+            assert response.json()['id'] == review_id
+        assert list(Review.objects.values_list('author_id', 'score')) == [(admin.pk, 10)]
+        title.refresh_from_db()
+        assert title.rating == 10
+
+        response = admin_client.put(url, data={'text': 'Плохо', 'score': 11})
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_archived_duplicate_rolled_back(self, admin_client, admin):
+        title = create_many_titles(1)[0]
+        ArchivedReview.objects.create(title=title, author=admin, text='Давно', score=3, pub_date=timezone.now())
+        response = admin_client.post(f'/api/v1/titles/{title.pk}/reviews/', data={'text': 'Снова', 'score': 9})
+        assert response.status_code == 400, (
+            'Проверьте, что отзыв на произведение, уже оцененное в архиве, возвращает 400'
+        )
+        title.refresh_from_db()
+        assert not Review.objects.exists() and (title.rating_sum, title.rating_count) == (0, 0), (
+            'Проверьте, что отклоненный из-за архива отзыв откатывается вместе с рейтингом'
+        )
@@ -0,0 +1,67 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, Title
+
+from .common import create_many_titles
+
+
+def histogram(response):
+    return {int(score): count for score, count in response.json()['histogram'].items()}
+
+
+class Test19ScoreHistogram:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_counters_follow_reviews(self, client, admin, moderator, user):
+        first, second = create_many_titles(2)
+        review = Review.objects.create(title=first, author=admin, text='Отлично', score=9)
+        Review.objects.create(title=first, author=moderator, text='Хорошо', score=9)
+        Review.objects.create(title=first, author=user, text='Плохо', score=2)
+        assert Title.objects.get(pk=first.pk).histogram == {**dict.fromkeys(range(1, 11), 0), 9: 2, 2: 1}
+
+        review.score = 4
+        review.save()
+        assert Title.objects.get(pk=first.pk).histogram == {**dict.fromkeys(range(1, 11), 0), 9: 1, 4: 1, 2: 1}, (
+            'Проверьте, что изменение оценки переносит ее в другой столбец гистограммы'
+        )
+        review.title = second
+        review.save()
+        review.delete()
+        assert sum(Title.objects.get(pk=second.pk).histogram.values()) == 0
+        assert sum(Title.objects.get(pk=first.pk).histogram.values()) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_opt_in_histogram(self, client, admin, user):
+        title = create_many_titles(1)[0]
+        Review.objects.create(title=title, author=admin, text='Отлично', score=10)
+        url = f'/api/v1/titles/{title.pk}/'
+
+        response = client.get(url)
+        assert 'histogram' not in response.json() and 'score_10_count' not in response.json(), (
+            'Проверьте, что гистограмма оценок выдается только по `?include=histogram`'
+        )
+        response = client.get(url, {'include': 'histogram'})
+        assert histogram(response) == {**dict.fromkeys(range(1, 11), 0), 10: 1}, (
+            'Проверьте, что `/api/v1/titles/{title_id}/?include=histogram` возвращает распределение оценок'
+        )
+        assert response['ETag'] != client.get(url)['ETag']
+
+        Review.objects.create(title=title, author=user, text='Плохо', score=1)
+        assert histogram(client.get(url, {'include': 'histogram'}))[1] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rebuild(self, admin):
+        title = create_many_titles(1)[0]
+        Review.objects.create(title=title, author=admin, text='Отлично', score=7)
+        Title.objects.filter(pk=title.pk).update(score_7_count=0, score_3_count=5)
+
+        out = StringIO()
+        call_command('recompute_aggregates', stdout=out)
+        assert 'score_3_count=5' in out.getvalue()
+        assert Title.objects.get(pk=title.pk).histogram[7] == 1, (
+            'Проверьте, что `recompute_aggregates` восстанавливает гистограмму оценок'
+        )
+        assert Title.objects.get(pk=title.pk).histogram[3] == 0
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reviews.models import Comment, Review
+
+from .common import create_many_titles
+
+
+def create_discussion(title, django_user_model, reviews_count, comments_count):
+    now = timezone.now()
+    reviews = []
+    for index in range(reviews_count):
+        author = django_user_model.objects.create_user(username=f'author{index}', email=f'author{index}@yamdb.fake')
+        review = Review.objects.create(title=title, author=author, text=f'Отзыв {index}', score=5)
+        for number in range(comments_count):
+            comment = Comment.objects.create(review=review, author=author, text=f'Комментарий {number}')
+            Comment.objects.filter(pk=comment.pk).update(pub_date=now - timedelta(minutes=comments_count - number))
+        reviews.append(review)
+    return reviews
+
+
+class Test20EmbeddedComments:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('reviews_count', (1, 4))
+    def test_01_latest_comments(self, client, django_user_model, reviews_count):
+        title = create_many_titles(1)[0]
+        create_discussion(title, django_user_model, reviews_count, 5)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {'embed': 'comments', 'comments_limit': 2})
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == reviews_count
+        for review in results:
+            assert [comment['text'] for comment in review['comments']] == ['Комментарий 4', 'Комментарий 3'], (
+                'Проверьте, что `?embed=comments&comments_limit=N` добавляет N последних комментариев к отзыву'
+            )
+            assert review['comments'][0]['author'] == review['author']
+        # произведение, счетчики архива и оперативных отзывов, отзывы, комментарии, авторы
+        assert len(queries) == 6, (
+            'Проверьте, что комментарии всех отзывов страницы загружаются одним запросом'
+        )
+
+        assert 'comments' not in client.get(url).json()['results'][0]
+        response = client.get(url, {'embed': 'comments'})
+        assert len(response.json()['results'][0]['comments']) == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalid_limit_and_etag(self, client, django_user_model):
+        title = create_many_titles(1)[0]
+        review = create_discussion(title, django_user_model, 1, 1)[0]
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        for value in ('0', 'abc', '1000'):
+            response = client.get(url, {'embed': 'comments', 'comments_limit': value})
+            assert response.status_code == 400, (
+                'Проверьте, что неверный `comments_limit` возвращает 400'
+            )
+
+        response = client.get(url, {'embed': 'comments'})
+        etag = response['ETag']
+        Comment.objects.create(review=review, author=review.author, text='Новый')
+        response = client.get(url, {'embed': 'comments'}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag списка отзывов со встроенными комментариями'
+        )
+        assert response.json()['results'][0]['comments'][0]['text'] == 'Новый'
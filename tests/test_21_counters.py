@@ -0,0 +1,74 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, Review, Title
+
+from .common import create_many_titles
+
+
+class Test21Counters:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_comments_count(self, client, admin, user):
+        title = create_many_titles(1)[0]
+        review = Review.objects.create(title=title, author=admin, text='Отлично', score=9)
+        other = Review.objects.create(title=title, author=user, text='Плохо', score=2)
+        for author in (admin, user, user):
+            Comment.objects.create(review=review, author=author, text='Комментарий')
+        Comment.objects.create(review=other, author=user, text='Комментарий')
+        review.refresh_from_db()
+        assert review.comments_count == 3, (
+            'Проверьте, что создание комментария увеличивает `comments_count` отзыва'
+        )
+
+        Comment.objects.filter(author=admin).first().delete()
+        review.refresh_from_db()
+        assert review.comments_count == 2
+
+        user.delete()
+        review.refresh_from_db()
+        assert review.comments_count == 0, (
+            'Проверьте, что каскадное удаление автора уменьшает `comments_count`'
+        )
+        assert Title.objects.get(pk=title.pk).rating_count == 1
+
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/{review.pk}/')
+        assert response.json()['comments_count'] == 0
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.json()['reviews_count'] == 1, (
+            'Проверьте, что `/api/v1/titles/{title_id}/` содержит `reviews_count`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_counts_in_api(self, admin_client, admin):
+        title = create_many_titles(1)[0]
+        response = admin_client.post(f'/api/v1/titles/{title.pk}/reviews/', data={'text': 'Хорошо', 'score': 7})
+        review_id = response.json()['id']
+        assert response.json()['comments_count'] == 0
+        url = f'/api/v1/titles/{title.pk}/reviews/{review_id}/'
+        etag = admin_client.get(url)['ETag']
+        admin_client.post(f'{url}comments/', data={'text': 'Комментарий'})
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response.json()['comments_count'] == 1, (
+            'Проверьте, что новый комментарий меняет `comments_count` и ETag отзыва'
+        )
+        response = admin_client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['reviews_count'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_repair(self, admin):
+        title = create_many_titles(1)[0]
+        review = Review.objects.create(title=title, author=admin, text='Отлично', score=9)
+        Comment.objects.create(review=review, author=admin, text='Комментарий')
+        Review.objects.filter(pk=review.pk).update(comments_count=7)
+
+        out = StringIO()
+        call_command('recompute_aggregates', '--check', stdout=out)
+        assert f'review={review.pk}' in out.getvalue(), (
+            'Проверьте, что `recompute_aggregates` сообщает о расхождениях `comments_count`'
+        )
+        call_command('recompute_aggregates', stdout=StringIO())
+        review.refresh_from_db()
+        assert review.comments_count == 1
@@ -0,0 +1,49 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from reviews.models import Review
+
+from .common import create_many_titles
+
+
+def read_ndjson(response):
+    body = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in body.splitlines()]
+
+
+class Test22ReviewsExport:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export(self, client, django_user_model):
+        title, other = create_many_titles(2)
+        started = timezone.now()
+        for index in range(5):
+            author = django_user_model.objects.create_user(username=f'author{index}', email=f'author{index}@yamdb.fake')
+            review = Review.objects.create(title=title, author=author, text=f'Отзыв {index}', score=index + 1)
+            Review.objects.filter(pk=review.pk).update(pub_date=started - timedelta(days=5 - index))
+        Review.objects.create(title=other, author=author, text='Чужой', score=1)
+
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/export/')
+        assert response.status_code == 200
+        assert response.streaming, 'Проверьте, что выгрузка отзывов отдается потоком'
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = read_ndjson(response)
+        assert [row['text'] for row in rows] == [f'Отзыв {index}' for index in range(5)], (
+            'Проверьте, что выгрузка содержит все отзывы произведения по возрастанию даты'
+        )
+        assert rows[0]['author'] == 'author0' and rows[0]['score'] == 1
+
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/export/', {'since': rows[2]['pub_date']})
+        assert [row['text'] for row in read_ndjson(response)] == ['Отзыв 3', 'Отзыв 4'], (
+            'Проверьте, что `since` возвращает только отзывы, опубликованные позже'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bad_requests(self, client):
+        title = create_many_titles(1)[0]
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/export/', {'since': 'вчера'})
+        assert response.status_code == 400
+        assert client.get(f'/api/v1/titles/{title.pk + 1}/reviews/export/').status_code == 404
@@ -0,0 +1,199 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reviews.models import ArchivedComment, ArchivedReview, Comment, Review, Title
+
+from .common import create_many_titles, selects_from
+
+
+def make_old(model, obj, days=400):
+    model.objects.filter(pk=obj.pk).update(pub_date=timezone.now() - timedelta(days=days))
+
+
+def archive(**options):
+    call_command('archive_old_rows', stdout=StringIO(), **options)
+
+
+class Test23Archive:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_archive_keeps_counters(self, admin, moderator, user):
+        title = create_many_titles(1)[0]
+        old = Review.objects.create(title=title, author=admin, text='Старый', score=3)
+        busy = Review.objects.create(title=title, author=moderator, text='Обсуждаемый', score=8)
+        fresh = Review.objects.create(title=title, author=user, text='Новый', score=10)
+        old_comment = Comment.objects.create(review=old, author=user, text='Старый комментарий')
+        Comment.objects.create(review=busy, author=user, text='Новый комментарий')
+        for review in (old, busy):
+            make_old(Review, review)
+        make_old(Comment, old_comment)
+
+        archive(chunk_size=1)
+        assert set(Review.objects.values_list('pk', flat=True)) == {busy.pk, fresh.pk}, (
+            'Проверьте, что в архив переносятся старые отзывы без оперативных комментариев'
+        )
+        assert list(ArchivedReview.objects.values_list('pk', flat=True)) == [old.pk]
+        assert list(ArchivedComment.objects.values_list('pk', 'review_id')) == [(old_comment.pk, old.pk)]
+        title = Title.objects.get(pk=title.pk)
+        assert (title.rating_sum, title.rating_count) == (21, 3), (
+            'Проверьте, что архивирование не меняет рейтинг произведения'
+        )
+        out = StringIO()
+        call_command('recompute_aggregates', '--check', stdout=out)
+        assert 'Расхождений нет' in out.getvalue(), (
+            'Проверьте, что `recompute_aggregates` учитывает архивные отзывы и комментарии'
+        )
+
+        user.delete()
+        assert not ArchivedComment.objects.exists()
+        assert ArchivedReview.objects.get(pk=old.pk).comments_count == 0
+        admin.delete()
+        title = Title.objects.get(pk=title.pk)
+        assert (title.rating_sum, title.rating_count) == (8, 1), (
+            'Проверьте, что удаление автора архивного отзыва уменьшает рейтинг'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('mode', ('page', 'cursor'))
+    def test_02_read_through(self, client, admin, django_user_model, mode):
+        title = create_many_titles(1)[0]
+        reviews = []
+        for index in range(12):
+            author = django_user_model.objects.create_user(username=f'author{index}', email=f'author{index}@yamdb.fake')
+            review = Review.objects.create(title=title, author=author, text=f'Отзыв {index}', score=5)
+            make_old(Review, review, days=100 - 2 * index)
+            reviews.append(review)
+        comment = Comment.objects.create(review=reviews[0], author=admin, text='Архивный комментарий')
+        make_old(Comment, comment, days=99)
+        archive(days=91)
+        assert ArchivedReview.objects.count() == 5
+
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        if mode == 'cursor':
+            url += '?pagination=cursor'
+        texts = []
+        while url:
+            data = client.get(url).json()
+            texts.extend(review['text'] for review in data['results'])
+            url = data['next']
+        assert texts == [f'Отзыв {index}' for index in reversed(range(12))], (
+            'Проверьте, что список отзывов продолжается архивными отзывами за пределами оперативных'
+        )
+
+        review_url = f'/api/v1/titles/{title.pk}/reviews/{reviews[0].pk}/'
+        response = client.get(review_url)
+        assert response.status_code == 200 and response.json()['comments_count'] == 1, (
+            'Проверьте, что архивный отзыв доступен по своему адресу'
+        )
+        response = client.get(f'{review_url}comments/')
+        assert [item['text'] for item in response.json()['results']] == ['Архивный комментарий']
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/', {'embed': 'comments', 'page': 2})
+        assert response.json()['results'][-1]['comments'][0]['text'] == 'Архивный комментарий'
+        rows = b''.join(client.get(f'/api/v1/titles/{title.pk}/reviews/export/').streaming_content).splitlines()
+        assert [json.loads(row)['text'] for row in rows] == [f'Отзыв {index}' for index in range(12)], (
+            'Проверьте, что выгрузка отзывов включает архивные'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('mode', ('page', 'cursor'))
+    def test_03_first_page_skips_archive(self, client, admin, django_user_model, mode):
+        title = create_many_titles(1)[0]
+        for index in range(16):
+            author = django_user_model.objects.create_user(username=f'author{index}', email=f'author{index}@yamdb.fake')
+            review = Review.objects.create(title=title, author=author, text=f'Отзыв {index}', score=5)
+            make_old(Review, review, days=100 - 2 * index)
+            if index == 0:
+                # Старейший отзыв с новым комментарием остается среди оперативных.
+                Comment.objects.create(review=review, author=admin, text='Новый комментарий')
+        archive(days=95)
+        assert ArchivedReview.objects.count() == 2
+
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        if mode == 'cursor':
+            url += '?pagination=cursor'
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(url).json()
+        assert not [query for query in queries if 'UNION' in query['sql']], (
+            'Проверьте, что первая страница читается из оперативной таблицы без UNION с архивом'
+        )
+        assert all('COUNT(' in sql for sql in selects_from(queries, 'reviews_archivedreview')), (
+            'Проверьте, что на первой странице архив только считается'
+        )
+        texts = [review['text'] for review in data['results']]
+        url = data['next']
+        while url:
+            data = client.get(url).json()
+            texts.extend(review['text'] for review in data['results'])
+            url = data['next']
+        assert texts == [f'Отзыв {index}' for index in reversed(range(16))], (
+            'Проверьте, что оперативный отзыв старше архивных идет после них'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_archived_rows_are_writable(self, admin_client, admin, user_client, moderator_client, user):
+        title = create_many_titles(1)[0]
+        review = Review.objects.create(title=title, author=admin, text='Старый', score=3)
+        comment = Comment.objects.create(review=review, author=user, text='Старый комментарий')
+        make_old(Review, review)
+        make_old(Comment, comment)
+        archive()
+        assert ArchivedReview.objects.filter(pk=review.pk).exists()
+
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = admin_client.post(url, data={'text': 'Снова', 'score': 9})
+        assert response.status_code == 400, (
+            'Проверьте, что нельзя оставить второй отзыв, если первый перенесен в архив'
+        )
+        assert user_client.patch(f'{url}{review.pk}/', data={'text': 'Чужая правка'}).status_code == 403
+        assert ArchivedReview.objects.filter(pk=review.pk).exists(), (
+            'Проверьте, что без прав архивный отзыв не возвращается из архива'
+        )
+        response = admin_client.patch(f'{url}{review.pk}/', data={'text': 'Правка', 'score': 4})
+        assert response.status_code == 200 and response.json()['text'] == 'Правка', (
+            'Проверьте, что автор может изменить архивный отзыв'
+        )
+        restored = Review.objects.get(pk=review.pk)
+        assert restored.pub_date < timezone.now() - timedelta(days=300) and restored.comments_count == 1
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (4, 1)
+
+        response = admin_client.put(f'{url}mine/', data={'text': 'Итог', 'score': 6})
+        assert response.status_code == 200 and response.json()['id'] == review.pk
+
+        comments_url = f'{url}{review.pk}/comments/'
+        assert user_client.post(comments_url, data={'text': 'Ответ'}).status_code == 201
+        assert moderator_client.delete(f'{comments_url}{comment.pk}/').status_code == 204, (
+            'Проверьте, что модератор может удалить архивный комментарий'
+        )
+        assert not ArchivedComment.objects.exists() and Review.objects.get(pk=review.pk).comments_count == 1
+
+        Review.objects.filter(pk=review.pk).update(pub_date=timezone.now() - timedelta(days=400))
+        Comment.objects.update(pub_date=timezone.now() - timedelta(days=400))
+        archive()
+        assert ArchivedReview.objects.filter(pk=review.pk).exists()
+        new_comment = ArchivedComment.objects.get()
+        assert user_client.patch(f'{comments_url}{new_comment.pk}/', data={'text': 'Правка'}).status_code == 200
+        assert user_client.post(comments_url, data={'text': 'Еще'}).status_code == 201, (
+            'Проверьте, что архивный отзыв можно комментировать'
+        )
+        Review.objects.filter(pk=review.pk).update(pub_date=timezone.now() - timedelta(days=400))
+        Comment.objects.update(pub_date=timezone.now() - timedelta(days=400))
+        archive()
+        response = user_client.post('/api/v1/comments/bulk/', data=[{'review': review.pk, 'text': 'Пакет'}], format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что массовое создание комментариев принимает архивный отзыв'
+        )
+        assert admin_client.delete(f'{url}{review.pk}/').status_code == 204
+        title.refresh_from_db()
+        assert not Review.objects.exists() and not ArchivedReview.objects.exists()
+        assert not Comment.objects.exists() and not ArchivedComment.objects.exists()
+        assert (title.rating_sum, title.rating_count) == (0, 0), (
+            'Проверьте, что удаление архивного отзыва уменьшает рейтинг'
+        )
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+
+from api.views import ReviewBulkCreateAPIView
+from reviews.models import ArchivedReview, Comment, Review, Title
+
+from .common import create_many_titles
+
+
+class Test24BulkCreate:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews(self, client, admin_client, admin):
+        titles = create_many_titles(5)
+        url = '/api/v1/reviews/bulk/'
+        items = [{'title': title.pk, 'text': f'Отзыв {title.pk}', 'score': 2 + index} for index, title in
+                 enumerate(titles)]
+        assert client.post(url, data=json.dumps(items), content_type='application/json').status_code == 401
+
+        etag = client.get(f'/api/v1/titles/{titles[0].pk}/')['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(url, data=items, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что POST `/api/v1/reviews/bulk/` создает все отзывы и возвращает 201'
+        )
+        ids = [Review.objects.get(author=admin, title=title).pk for title in titles]
+        assert response.json() == {'created': 5, 'ids': ids}, (
+            'Проверьте, что ответ содержит id созданных отзывов в порядке элементов запроса'
+        )
+        assert len(queries) < 5 + len(titles) + 4, (
+            'Проверьте, что отзывы вставляются одним bulk_create, а не по одному'
+        )
+        assert Review.objects.filter(author=admin).count() == 5
+        title = Title.objects.get(pk=titles[4].pk)
+        assert (title.rating_sum, title.rating_count, title.score_6_count) == (6, 1, 1), (
+            'Проверьте, что массовое создание обновляет рейтинг и гистограмму произведений'
+        )
+        assert client.get(f'/api/v1/titles/{titles[0].pk}/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_all_or_nothing(self, admin_client, admin):
+        first, second = create_many_titles(2)
+        Review.objects.create(title=first, author=admin, text='Уже есть', score=5)
+        items = [
+            {'title': second.pk, 'text': 'Хорошо', 'score': 7},
+            {'title': first.pk, 'text': 'Повтор', 'score': 7},
+            {'title': second.pk + 100, 'text': 'Нет такого', 'score': 7},
+            {'title': second.pk, 'text': 'Оценка', 'score': 11},
+            'не объект',
+        ]
+        response = admin_client.post('/api/v1/reviews/bulk/', data=items, format='json')
+        assert response.status_code == 400
+        errors = response.json()['errors']
+        assert len(errors) == len(items) and errors[0] == {}, (
+            'Проверьте, что ошибки возвращаются по каждому элементу массива'
+        )
+        assert all(errors[1:]), errors
+        assert Review.objects.count() == 1, (
+            'Проверьте, что при ошибке в любом элементе не создается ни один отзыв'
+        )
+        items = [{'title': second.pk, 'text': 'Раз', 'score': 7}, {'title': second.pk, 'text': 'Два', 'score': 8}]
+        response = admin_client.post('/api/v1/reviews/bulk/', data=items, format='json')
+        assert response.status_code == 400 and response.json()['errors'][0] == {}
+        for data in ({}, [], [{}] * 501):
+            assert admin_client.post('/api/v1/reviews/bulk/', data=data, format='json').status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_archived_after_check(self, admin_client, admin, monkeypatch):
+        first, second = create_many_titles(2)
+        check_items = ReviewBulkCreateAPIView.check_items
+
+        def archive_concurrently(view, items, errors):
+            check_items(view, items, errors)
+            ArchivedReview.objects.create(title=second, author=admin, text='Давно', score=3, pub_date=timezone.now())
+
+        monkeypatch.setattr(ReviewBulkCreateAPIView, 'check_items', archive_concurrently)
+        items = [{'title': first.pk, 'text': 'Раз', 'score': 7}, {'title': second.pk, 'text': 'Два', 'score': 8}]
+        response = admin_client.post('/api/v1/reviews/bulk/', data=items, format='json')
+        assert response.status_code == 400 and response.json()['errors'][0] == {}, (
+            'Проверьте, что архивный отзыв, появившийся после проверки, находится после вставки'
+        )
+        assert response.json()['errors'][1]
+        second.refresh_from_db()
+        assert not Review.objects.exists() and second.rating_count == 0, (
+            'Проверьте, что при совпадении с архивом вставка откатывается целиком'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_comments(self, client, admin_client, admin):
+        first, second = create_many_titles(2)
+        reviews = [Review.objects.create(title=title, author=admin, text='Отзыв', score=5)
+                   for title in (first, second)]
+        url = f'/api/v1/titles/{first.pk}/reviews/'
+        etag = client.get(url)['ETag']
+        items = [{'review': review.pk, 'text': f'Комментарий {index}'}
+                 for index, review in enumerate(reviews * 3)]
+        response = admin_client.post('/api/v1/comments/bulk/', data=items, format='json')
+        assert response.status_code == 201 and response.json()['created'] == 6
+        comments = Comment.objects.in_bulk(response.json()['ids'])
+        assert [(comments[pk].review_id, comments[pk].text) for pk in response.json()['ids']] == [
+            (item['review'], item['text']) for item in items
+        ], 'Проверьте, что ответ содержит id созданных комментариев в порядке элементов запроса'
+        assert Comment.objects.count() == 6
+        assert [Review.objects.get(pk=review.pk).comments_count for review in reviews] == [3, 3], (
+            'Проверьте, что массовое создание комментариев обновляет `comments_count`'
+        )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+        response = admin_client.post(
+            '/api/v1/comments/bulk/', data=[{'review': reviews[1].pk + 100, 'text': 'Куда'}], format='json'
+        )
+        assert response.status_code == 400 and 'review' in response.json()['errors'][0]
@@ -0,0 +1,97 @@
+import json
+import random
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.compression import COMPRESSED_PREFIX, to_storage
+from reviews.models import Comment, Review
+
+from .common import create_many_titles
+
+
+ESSAY = 'Очень длинный отзыв о произведении. ' * 200
+
+
+def stored_text(table, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT text FROM {table} WHERE id = %s', [pk])
+        return cursor.fetchone()[0]
+
+
+class Test25CompressedTexts:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_compressed_at_rest(self, client, admin, settings):
+        settings.TEXT_COMPRESSION_THRESHOLD = 1024
+        title = create_many_titles(1)[0]
+        review = Review.objects.create(title=title, author=admin, text=ESSAY, score=8)
+        short = Comment.objects.create(review=review, author=admin, text='Коротко')
+        tricky = Comment.objects.create(review=review, author=admin, text=COMPRESSED_PREFIX + 'не сжато')
+
+        stored = stored_text('reviews_review', review.pk)
+        assert stored.startswith(COMPRESSED_PREFIX) and len(stored) < len(ESSAY) // 5, (
+            'Проверьте, что длинный текст отзыва хранится сжатым'
+        )
+        assert stored_text('reviews_comment', short.pk) == 'Коротко'
+        loaded = Review.objects.get(pk=review.pk)
+        assert loaded.__dict__['text'] == stored, (
+            'Проверьте, что текст распаковывается только при обращении к нему'
+        )
+        assert isinstance(loaded.text, str) and loaded.text == ESSAY, (
+            'Проверьте, что сжатый текст читается из базы как строка'
+        )
+        assert json.loads(json.dumps(loaded.text)) == ESSAY and str(loaded) == ESSAY
+        assert Comment.objects.get(pk=tricky.pk).text == COMPRESSED_PREFIX + 'не сжато'
+
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/{review.pk}/')
+        assert response.json()['text'] == ESSAY, (
+            'Проверьте, что API отдает распакованный текст'
+        )
+        rows = b''.join(client.get(f'/api/v1/titles/{title.pk}/reviews/export/').streaming_content)
+        assert json.loads(rows)['text'] == ESSAY
+
+        loaded.score = 9
+        loaded.save()
+        assert stored_text('reviews_review', review.pk) == stored
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recompress_command(self, admin, settings):
+        title = create_many_titles(1)[0]
+        review = Review.objects.create(title=title, author=admin, text=ESSAY + 'конец', score=5)
+        comments = [Comment.objects.create(review=review, author=admin, text=ESSAY) for _ in range(3)]
+        assert not stored_text('reviews_comment', comments[0].pk).startswith(COMPRESSED_PREFIX)
+
+        settings.TEXT_COMPRESSION_THRESHOLD = 1024
+        out = StringIO()
+        call_command('compress_texts', '--chunk-size', '2', stdout=out)
+        saved = len(ESSAY.encode('utf-8')) - len(stored_text('reviews_comment', comments[0].pk))
+        assert f'reviews.Comment.text: изменено строк 3, сэкономлено байт {3 * saved}' in out.getvalue(), (
+            'Проверьте, что `compress_texts` считает сэкономленное место в байтах'
+        )
+        for comment in comments:
+            assert stored_text('reviews_comment', comment.pk).startswith(COMPRESSED_PREFIX), (
+                'Проверьте, что `compress_texts` сжимает уже сохраненные тексты'
+            )
+        assert stored_text('reviews_review', review.pk).startswith(COMPRESSED_PREFIX)
+        assert Review.objects.get(pk=review.pk).text == ESSAY + 'конец'
+
+        settings.TEXT_COMPRESSION_THRESHOLD = None
+        call_command('compress_texts', stdout=StringIO())
+        assert stored_text('reviews_comment', comments[2].pk) == ESSAY, (
+            'Проверьте, что без порога `compress_texts` распаковывает тексты'
+        )
+
+    def test_03_threshold_in_bytes(self, settings):
+        settings.TEXT_COMPRESSION_THRESHOLD = 1024
+        rng = random.Random(0)
+        # Иероглифы занимают по 3 байта и сжимаются плохо: сжатое значение
+        # длиннее текста в символах, но короче его в байтах.
+        text = ''.join(chr(rng.randint(0x4E00, 0x9FFF)) for _ in range(2000))
+        stored = to_storage(text)
+        assert len(text) < len(stored) < len(text.encode('utf-8'))
+        assert stored.startswith(COMPRESSED_PREFIX), (
+            'Проверьте, что выгода от сжатия считается в байтах, а не в символах'
+        )
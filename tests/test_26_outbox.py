@@ -0,0 +1,81 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews import outbox
+from reviews.models import OutboxEmail
+
+from .common import signup
+
+
+class Test26Outbox:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_only_enqueues(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        with mock.patch('django.core.mail.get_connection') as get_connection:
+            response = signup(client, 1)
+        assert response.status_code == 200
+        get_connection.assert_not_called()
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что регистрация не отправляет письмо сама, а ставит его в очередь'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.to == ['user1@yamdb.fake'] and email.status == OutboxEmail.PENDING
+
+        out = StringIO()
+        call_command('send_outbox', '--stats', stdout=out)
+        assert 'ожидают 1' in out.getvalue(), 'Проверьте, что команда показывает размер очереди'
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('workers', (1, 3))
+    def test_02_worker_pool(self, client, settings, workers):
+        settings.EMAIL_OUTBOX_EAGER = False
+        for index in range(7):
+            signup(client, index)
+        with mock.patch('reviews.outbox.get_connection', wraps=outbox.get_connection) as get_connection:
+            call_command(
+                'send_outbox', '--workers', str(workers), '--batch-size', '3', stdout=StringIO()
+            )
+        assert len(mail.outbox) == 7, 'Проверьте, что обработчик отправляет все письма из очереди'
+        assert sorted(message.to[0] for message in mail.outbox) == sorted(
+            f'user{index}@yamdb.fake' for index in range(7)
+        )
+        assert get_connection.call_count <= 3 + workers, (
+            'Проверьте, что одно соединение используется для целой пачки писем'
+        )
+        assert not OutboxEmail.objects.exclude(status=OutboxEmail.SENT).exists()
+        call_command('send_outbox', stdout=StringIO())
+        assert len(mail.outbox) == 7
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_retry_with_backoff(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        email = outbox.enqueue('Тема', 'Текст', 'from@yamdb.fake', ['to@yamdb.fake'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('нет сети')):
+            assert outbox.drain(1, 10) == 0
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.PENDING and email.attempts == 1, (
+            'Проверьте, что после ошибки письмо остается в очереди'
+        )
+        assert email.next_attempt_at > timezone.now() + timedelta(seconds=30), (
+            'Проверьте, что повторная попытка откладывается'
+        )
+        assert 'нет сети' in email.last_error
+        assert outbox.drain(1, 10) == 0, 'Проверьте, что письмо не отправляется раньше срока'
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError):
+            outbox.drain(1, 10)
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.FAILED, (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо помечается неотправленным'
+        )
+        assert outbox.retry_delay(1) < outbox.retry_delay(2) < outbox.retry_delay(3)
+        assert outbox.retry_delay(50) == timedelta(seconds=settings.EMAIL_OUTBOX_MAX_RETRY_DELAY)
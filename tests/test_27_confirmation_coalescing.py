@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reviews import outbox
+from reviews.models import CoalescedEmail, OutboxEmail
+
+from .common import signup
+
+
+class Test27ConfirmationCoalescing:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_repeated_signup_suppressed(self, client, settings):
+        settings.EMAIL_COALESCE_WINDOW = 60
+        for _ in range(3):
+            response = signup(client)
+            assert response.status_code == 200, (
+                'Проверьте, что повторная регистрация в пределах окна по-прежнему возвращает 200'
+            )
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что повторные запросы кода в пределах EMAIL_COALESCE_WINDOW не отправляют новых писем'
+        )
+        assert OutboxEmail.objects.count() == 1
+        signup(client, 2)
+        assert len(mail.outbox) == 2, 'Проверьте, что окно действует отдельно для каждого пользователя'
+        assert outbox.coalesce_stats() == {'sent': 2, 'suppressed': 2}
+
+        out = StringIO()
+        call_command('send_outbox', '--stats', stdout=out)
+        assert 'поставлено 2, подавлено 2' in out.getvalue(), (
+            'Проверьте, что send_outbox --stats показывает счетчики повторных писем'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_window_expires(self, client, settings):
+        settings.EMAIL_COALESCE_WINDOW = 60
+        signup(client)
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=61)):
+            signup(client)
+        assert len(mail.outbox) == 2, (
+            'Проверьте, что после окончания окна письмо с кодом отправляется снова'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_reuses_pending_email(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_COALESCE_WINDOW = 60
+        first = outbox.enqueue_coalesced('key', 'Subject', 'Body', 'from@yamdb.fake', ['to@yamdb.fake'])
+        second = outbox.enqueue_coalesced('key', 'Subject', 'Body', 'from@yamdb.fake', ['to@yamdb.fake'])
+        email = OutboxEmail.objects.get()
+        assert first == (email.pk, True) and second == (email.pk, False), (
+            'Проверьте, что повторный вызов в пределах окна возвращает уже поставленное письмо'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_disabled(self, client, settings):
+        settings.EMAIL_COALESCE_WINDOW = 0
+        signup(client)
+        signup(client)
+        assert len(mail.outbox) == 2, 'Проверьте, что при EMAIL_COALESCE_WINDOW = 0 письма не подавляются'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_stored_in_table(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_COALESCE_WINDOW = 60
+        email_pk, _ = outbox.enqueue_coalesced('key', 'Subject', 'Body', 'from@yamdb.fake', ['to@yamdb.fake'])
+        with CaptureQueriesContext(connection) as queries:
+            assert outbox.enqueue_coalesced(
+                'key', 'Subject', 'Body', 'from@yamdb.fake', ['to@yamdb.fake']
+            ) == (email_pk, False)
+        assert len(queries) == 1, (
+            'Проверьте, что повторный вызов в пределах окна проверяет отметку одним запросом'
+        )
+        marker = CoalescedEmail.objects.get()
+        assert (marker.key, marker.email_id, marker.sent, marker.suppressed) == ('key', email_pk, 1, 1), (
+            'Проверьте, что отметка и счетчики хранятся в таблице CoalescedEmail'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_released_on_failure(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_COALESCE_WINDOW = 60
+        with mock.patch.object(outbox, 'enqueue', side_effect=RuntimeError), pytest.raises(RuntimeError):
+            outbox.enqueue_coalesced('key', 'Subject', 'Body', 'from@yamdb.fake', ['to@yamdb.fake'])
+        email_pk, created = outbox.enqueue_coalesced('key', 'Subject', 'Body', 'from@yamdb.fake', ['to@yamdb.fake'])
+        assert created and email_pk == OutboxEmail.objects.get().pk, (
+            'Проверьте, что отметка освобождается, если письмо не удалось поставить в очередь'
+        )
+        assert outbox.coalesce_stats() == {'sent': 1, 'suppressed': 0}
@@ -0,0 +1,68 @@
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.views import SignupAPIView
+from reviews.models import User
+
+from .common import selects_from
+
+URL = '/api/v1/auth/signup/'
+
+
+class Test28SignupQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_single_lookup(self, client):
+        data = {'username': 'user1', 'email': 'user1@yamdb.fake'}
+        with CaptureQueriesContext(connection) as new_user:
+            response = client.post(URL, data=data)
+        assert response.status_code == 200
+        with CaptureQueriesContext(connection) as existing_user:
+            response = client.post(URL, data=data)
+        assert response.status_code == 200
+        for queries in (new_user, existing_user):
+            assert len(selects_from(queries, 'reviews_user')) == 1, (
+                'Проверьте, что регистрация ищет пользователя одним запросом по username или email'
+            )
+        assert len(existing_user) == 2, (
+            'Проверьте, что повторный запрос кода в пределах окна стоит двух запросов: '
+            'поиск пользователя и отметка повторного письма'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('data', (
+        {'username': 'user1', 'email': 'other@yamdb.fake'},
+        {'username': 'other', 'email': 'user1@yamdb.fake'},
+        {'username': 'user1', 'email': 'user2@yamdb.fake'},
+    ))
+    def test_02_conflict(self, client, data):
+        User.objects.create(username='user1', email='user1@yamdb.fake')
+        User.objects.create(username='user2', email='user2@yamdb.fake')
+        response = client.post(URL, data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что регистрация с занятым username или email возвращает 400'
+        )
+        assert User.objects.count() == 2 and len(mail.outbox) == 0
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('data,code', (
+        ({'username': 'user1', 'email': 'user1@yamdb.fake'}, 200),
+        ({'username': 'user1', 'email': 'other@yamdb.fake'}, 400),
+    ))
+    def test_03_concurrent_create(self, client, data, code):
+        # Первый поиск не видит пользователя, которого создал параллельный запрос.
+        User.objects.create(username='user1', email='user1@yamdb.fake')
+        matching_users = SignupAPIView.matching_users
+        with mock.patch.object(
+            SignupAPIView, 'matching_users', side_effect=[[], matching_users('user1', data['email'])]
+        ):
+            response = client.post(URL, data=data)
+        assert response.status_code == code, (
+            'Проверьте, что нарушение уникальности при создании пользователя не приводит к ошибке 500'
+        )
+        assert User.objects.count() == 1
+        assert len(mail.outbox) == (1 if code == 200 else 0)
@@ -0,0 +1,140 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import ClaimsAccessToken, StatelessJWTAuthentication
+from reviews.models import Review, User
+
+from .common import client_for, create_many_titles, selects_from
+
+
+def create_category(client, slug):
+    return client.post('/api/v1/categories/', data={'name': slug, 'slug': slug})
+
+
+class Test29StatelessAuth:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_user_query(self, admin):
+        client = client_for(ClaimsAccessToken.for_user(admin))
+        with CaptureQueriesContext(connection) as queries:
+            response = create_category(client, 'films')
+        assert response.status_code == 201
+        assert not selects_from(queries, 'reviews_user'), (
+            'Проверьте, что права проверяются по утверждениям токена без запроса пользователя'
+        )
+        request = Request(APIRequestFactory().get(
+            '/api/v1/users/', HTTP_AUTHORIZATION=f'Bearer {ClaimsAccessToken.for_user(admin)}'
+        ))
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+        assert user.pk == admin.pk and not queries.captured_queries, (
+            'Проверьте, что аутентификация по утверждениям токена не выполняет SQL-запросов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_login_token_has_claims(self, client, admin):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': admin.username, 'confirmation_code': default_token_generator.make_token(admin)
+        })
+        token = AccessToken(response.json()['token'])
+        assert token['role'] == 'admin' and 'auth_version' in token, (
+            'Проверьте, что выданный токен содержит роль и версию прав'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_role_change_revokes_claims(self, admin):
+        client = client_for(ClaimsAccessToken.for_user(admin))
+        assert create_category(client, 'films').status_code == 201
+        admin.role = 'user'
+        admin.save()
+        with CaptureQueriesContext(connection) as queries:
+            response = create_category(client, 'books')
+        assert response.status_code == 403, (
+            'Проверьте, что после смены роли токен с прежней ролью больше не дает прав'
+        )
+        assert selects_from(queries, 'reviews_user'), (
+            'Проверьте, что токен с устаревшей версией прав проверяется по базе'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_fallbacks(self, admin):
+        legacy = client_for(AccessToken.for_user(admin))
+        assert create_category(legacy, 'films').status_code == 201, (
+            'Проверьте, что токены без утверждений о правах по-прежнему принимаются'
+        )
+        client = client_for(ClaimsAccessToken.for_user(admin))
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200 and response.json()['bio'] == 'admin bio', (
+            'Проверьте, что /users/me/ возвращает полную модель пользователя'
+        )
+        admin.delete()
+        assert create_category(client, 'books').status_code == 401, (
+            'Проверьте, что токен удаленного пользователя отклоняется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_author_checks(self, user, moderator):
+        title = create_many_titles(1)[0]
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        author = client_for(ClaimsAccessToken.for_user(user))
+        response = author.post(url, data={'text': 'Отлично', 'score': 9})
+        assert response.status_code == 201 and response.json()['author'] == user.username
+        review = Review.objects.get()
+        assert review.author_id == user.pk
+        assert author.patch(f'{url}{review.pk}/', data={'score': 5}).status_code == 200
+
+        moderator.role = 'user'
+        moderator.save()
+        other = client_for(ClaimsAccessToken.for_user(moderator))
+        assert other.patch(f'{url}{review.pk}/', data={'score': 1}).status_code == 403, (
+            'Проверьте, что чужой отзыв нельзя изменить'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_role_change_in_other_process(self, admin, settings):
+        client = client_for(ClaimsAccessToken.for_user(admin))
+        assert create_category(client, 'films').status_code == 201
+        # Другой процесс: общая база, но свои кэши в памяти.
+        other_process = {**settings.CACHES, 'auth': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'other-process'
+        }}
+        with override_settings(CACHES=other_process):
+            admin.role = 'user'
+            admin.save()
+        assert create_category(client, 'books').status_code == 201, (
+            'Проверьте, что до истечения AUTH_VERSION_CACHE_TIMEOUT процесс верит запомненной версии'
+        )
+        # Версия истекла: токен проверяется по базе.
+        caches[settings.AUTH_CACHE_ALIAS].clear()
+        assert create_category(client, 'music').status_code == 403, (
+            'Проверьте, что после истечения версии прав смену роли в другом процессе видно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_bulk_role_change(self, admin, moderator):
+        admin_client = client_for(ClaimsAccessToken.for_user(admin))
+        moderator_client = client_for(ClaimsAccessToken.for_user(moderator))
+        assert create_category(admin_client, 'films').status_code == 201
+        User.objects.filter(pk=admin.pk).update(role='user')
+        assert create_category(admin_client, 'books').status_code == 403, (
+            'Проверьте, что смена роли через `update()` тоже отзывает права из токена'
+        )
+        moderator.role = 'admin'
+        User.objects.bulk_update([moderator], ['role'])
+        assert create_category(moderator_client, 'books').status_code == 201, (
+            'Проверьте, что смена роли через `bulk_update()` тоже учитывается'
+        )
+
+    def test_08_openapi_security_scheme(self):
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+        assert 'jwtAuth' in schema['components']['securitySchemes'], (
+            'Проверьте, что схема OpenAPI описывает аутентификацию StatelessJWTAuthentication'
+        )
+        assert {'jwtAuth': []} in schema['paths']['/api/v1/users/']['get']['security']
@@ -0,0 +1,77 @@
+import time
+from unittest import mock
+
+import pytest
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.authentication import ClaimsAccessToken, token_cache
+from api.cache import LRUCache
+
+from .common import client_for
+
+
+class Test30TokenCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_validated_once(self, admin):
+        token = ClaimsAccessToken.for_user(admin)
+        client = client_for(token)
+        with mock.patch.object(
+            JWTAuthentication, 'get_validated_token', autospec=True, side_effect=JWTAuthentication.get_validated_token
+        ) as validate:
+            for _ in range(3):
+                assert client.get('/api/v1/users/').status_code == 200
+        assert validate.call_count == 1, (
+            'Проверьте, что повторный запрос с тем же токеном не проверяет подпись заново'
+        )
+        assert token_cache.stats() == {'hits': 2, 'misses': 1, 'size': 1}, (
+            'Проверьте, что кэш токенов считает попадания и промахи'
+        )
+        entry = next(iter(token_cache._data.values()))
+        assert entry[1] == token['exp'], 'Проверьте, что запись кэша истекает вместе с токеном'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalid_token_not_cached(self, admin):
+        client = client_for('not-a-token')
+        assert client.get('/api/v1/users/').status_code == 401
+        assert client.get('/api/v1/users/').status_code == 401
+        assert token_cache.stats()['size'] == 0, 'Проверьте, что недействительные токены не попадают в кэш'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_disabled(self, admin, settings):
+        settings.AUTH_TOKEN_CACHE_SIZE = 0
+        client = client_for(ClaimsAccessToken.for_user(admin))
+        assert client.get('/api/v1/users/').status_code == 200
+        assert client.get('/api/v1/users/').status_code == 200
+        assert token_cache.stats()['size'] == 0, 'Проверьте, что AUTH_TOKEN_CACHE_SIZE = 0 выключает кэш'
+
+    def test_04_lru_expiry(self):
+        lru = LRUCache(2)
+        lru.set('expired', 1, expires_at=time.time() - 1)
+        lru.set('fresh', 2, expires_at=time.time() + 60)
+        assert lru.get('expired') is None and 'expired' not in lru._data, (
+            'Проверьте, что истекшая запись не возвращается и удаляется'
+        )
+        assert lru.get('fresh') == 2
+        lru.set('a', 3)
+        lru.set('b', 4)
+        assert lru.get('fresh') is None and lru.get('b') == 4, 'Проверьте вытеснение давно неиспользуемых ключей'
+
+    def test_05_size_from_settings(self, settings):
+        lru = LRUCache('AUTH_TOKEN_CACHE_SIZE')
+        settings.AUTH_TOKEN_CACHE_SIZE = 1
+        lru.set('a', 1)
+        lru.set('b', 2)
+        assert len(lru) == 1, 'Проверьте, что размер кэша берется из настройки при записи'
+        settings.AUTH_TOKEN_CACHE_SIZE = 0
+        lru.set('c', 3)
+        assert lru.get('c') is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_stats_endpoint(self, admin):
+        client = client_for(ClaimsAccessToken.for_user(admin))
+        client.get('/api/v1/cache/stats/')
+        stats = client.get('/api/v1/cache/stats/').json()['tokens']
+        assert stats == {'hits': 1, 'misses': 1, 'size': 1}, (
+            'Проверьте, что `/api/v1/cache/stats/` отдает счетчики кэша токенов'
+        )